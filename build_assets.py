@@ -0,0 +1,156 @@
+"""
+Vendor the third-party front-end assets into static/ and build the bundles.
+
+    python build_assets.py [--no-bundle] [--no-compress]
+
+1. Downloads Bootstrap, Bootstrap Icons, jQuery and the Inter font into
+   static/vendor/, together with the fonts their stylesheets refer to.
+2. Concatenates them into static/dist/bundle.css and static/dist/bundle.js,
+   next to static/dist/jquery.js. jQuery stays separate because the pages'
+   inline scripts need it in <head>, while the Bootstrap bundle is loaded at
+   the end of <body>. base.html uses these files when they exist and the
+   public CDNs otherwise.
+3. Writes .gz (and .br, with the brotli package) siblings next to every text
+   asset under static/, which /static serves to clients that accept them.
+
+Run it again after changing anything under static/; the application picks up
+the new files (and their fingerprinted names) on its next start.
+"""
+import argparse
+import re
+import sys
+from pathlib import Path, PurePosixPath
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from services.compression import brotli, compress
+from services.static_assets import PRECOMPRESSED_SUFFIXES, static_dir
+
+vendor_dir = static_dir / "vendor"
+dist_dir = static_dir / "dist"
+
+# Pinned to the versions base.html loads from the CDNs
+CSS_ASSETS = [
+    ("https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css", "bootstrap/bootstrap.min.css"),
+    ("https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.min.css",
+     "bootstrap-icons/bootstrap-icons.min.css"),
+    ("https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.18/latin-400.css", "inter/latin-400.css"),
+    ("https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.18/latin-500.css", "inter/latin-500.css"),
+    ("https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.18/latin-600.css", "inter/latin-600.css"),
+    ("https://cdn.jsdelivr.net/npm/@fontsource/inter@5.0.18/latin-700.css", "inter/latin-700.css"),
+]
+JQUERY_ASSET = ("https://cdn.jsdelivr.net/npm/jquery@3.7.1/dist/jquery.min.js", "jquery/jquery.min.js")
+JS_ASSETS = [
+    ("https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js", "bootstrap/bootstrap.bundle.min.js"),
+]
+
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".txt", ".ico"}
+
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+SOURCE_MAP = re.compile(r"^\s*(//|/\*)# sourceMappingURL=.*$", re.MULTILINE)
+
+
+def is_relative_url(reference: str) -> bool:
+    return not reference.startswith(("data:", "#", "/")) and not urlsplit(reference).scheme
+
+
+def css_references(css: str) -> list[str]:
+    """
+    Relative URLs (fonts, images) a stylesheet refers to.
+    """
+    return [reference for _, reference in CSS_URL.findall(css) if is_relative_url(reference)]
+
+
+def download(client: httpx.Client, url: str, destination: Path) -> bytes:
+    print(f"  {url}")
+    response = client.get(url)
+    response.raise_for_status()
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    destination.write_bytes(response.content)
+    return response.content
+
+
+def vendor(client: httpx.Client):
+    print(f"Downloading into {vendor_dir}")
+    for url, path in [JQUERY_ASSET, *JS_ASSETS]:
+        download(client, url, vendor_dir / path)
+
+    for url, path in CSS_ASSETS:
+        destination = vendor_dir / path
+        css = download(client, url, destination).decode()
+        for reference in css_references(css):
+            file_path = urlsplit(reference).path
+            download(client, urljoin(url, file_path), destination.parent / file_path)
+
+
+def rebase_css(css: str, source: Path, target_dir: Path) -> str:
+    """
+    Rewrite the relative URLs of a stylesheet moved from source to target_dir.
+    """
+    def rebase(match):
+        reference = match.group(2)
+        if not is_relative_url(reference):
+            return match.group(0)
+        path, _, suffix = reference.partition("?")
+        rebased = PurePosixPath(Path(source.parent, path).resolve().relative_to(static_dir.resolve()).as_posix())
+        depth = len(target_dir.resolve().relative_to(static_dir.resolve()).parts)
+        relative = "../" * depth + str(rebased)
+        return f'url("{relative}{"?" + suffix if suffix else ""}")'
+
+    return CSS_URL.sub(rebase, css)
+
+
+def bundle():
+    print(f"Bundling into {dist_dir}")
+    dist_dir.mkdir(parents=True, exist_ok=True)
+
+    css = []
+    for _, path in CSS_ASSETS:
+        source = vendor_dir / path
+        css.append(f"/* {path} */\n" + rebase_css(SOURCE_MAP.sub("", source.read_text()), source, dist_dir))
+    (dist_dir / "bundle.css").write_text("\n".join(css))
+
+    # The separating ";" keeps a file without a trailing semicolon from running into the next
+    js = [f"/* {path} */\n" + SOURCE_MAP.sub("", (vendor_dir / path).read_text()) for _, path in JS_ASSETS]
+    (dist_dir / "bundle.js").write_text(";\n".join(js))
+
+    # jQuery is kept out of the bundle, base.html loads it in <head>
+    _, path = JQUERY_ASSET
+    (dist_dir / "jquery.js").write_text(f"/* {path} */\n" + SOURCE_MAP.sub("", (vendor_dir / path).read_text()))
+
+
+def precompress():
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"Precompressing ({', '.join(encodings)})")
+    for file in sorted(static_dir.rglob("*")):
+        if not file.is_file() or file.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = file.read_bytes()
+        for encoding in encodings:
+            file.with_name(file.name + PRECOMPRESSED_SUFFIXES[encoding]).write_bytes(
+                compress(data, encoding, gzip_level=9, brotli_level=11))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Vendor, bundle and precompress the static assets.")
+    parser.add_argument("--no-bundle", action="store_true", help="only download the vendored files")
+    parser.add_argument("--no-compress", action="store_true", help="do not write .gz/.br siblings")
+    args = parser.parse_args()
+
+    try:
+        with httpx.Client(timeout=30, follow_redirects=True) as client:
+            vendor(client)
+    except httpx.HTTPError as e:
+        print(f"Could not download the vendored assets: {e}", file=sys.stderr)
+        return 1
+
+    if not args.no_bundle:
+        bundle()
+    if not args.no_compress:
+        precompress()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, HTTPException
 import uvicorn
 
@@ -10,9 +12,23 @@ from routers.search import router as search_router
 from routers.admin import router as admin_router
 from routers.conversations import router as conversations_router
 
-from services.jinja import templates
+from services import config
+from services.compression import CompressionMiddleware, PrecompressedPages
+from services.http_client import HttpClient
+from services.jinja import precompile_templates, templates
+from services.static_assets import FingerprintedStaticFiles, assets
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.TEMPLATE_PRODUCTION:
+        precompile_templates()
+    # One pooled client to the backend API for the whole application lifetime
+    await HttpClient.start()
+    yield
+    await HttpClient.stop()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(main_router)
 app.include_router(auth_router, prefix="/auth")
@@ -23,32 +39,47 @@ app.include_router(search_router, prefix="/search")
 app.include_router(admin_router, prefix="/admin")
 app.include_router(conversations_router, prefix="/conversations")
 
+app.mount("/static", FingerprintedStaticFiles(assets=assets), name="static")
+
+@app.middleware("http")
+async def user_lookup_counter(request: Request, call_next):
+    """
+    Expose how many /users/me fetches served how many user lookups in this request.
+    """
+    response = await call_next(request)
+    fetches = getattr(request.state, "user_data_fetches", 0)
+    calls = getattr(request.state, "user_data_calls", 0)
+    response.headers["X-User-Lookups"] = f"{fetches}/{calls}"
+    return response
+
+if config.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_level=config.COMPRESSION_BROTLI_LEVEL,
+        brotli_enabled=config.COMPRESSION_BROTLI,
+        content_types=config.COMPRESSION_CONTENT_TYPES
+    )
+
+# The error pages are static, so they are rendered and compressed only once
+error_pages = PrecompressedPages(
+    templates,
+    brotli_enabled=config.COMPRESSION_BROTLI,
+    enabled=config.COMPRESSION_ENABLED
+)
+
 @app.exception_handler(404)
 async def custom_404_handler(request: Request, exc: HTTPException):
-    return templates.TemplateResponse\
-    (
-        "404.html",
-        {"request": request, "path": request.url.path},
-        status_code=404
-    )
+    return error_pages.response(request, "404.html", status_code=404)
 
 @app.exception_handler(403)
 async def custom_403_handler(request: Request, exc: HTTPException):
-    return templates.TemplateResponse\
-    (
-        "403.html",
-        {"request": request, "path": request.url.path},
-        status_code=403
-    )
+    return error_pages.response(request, "403.html", status_code=403)
 
 @app.exception_handler(500)
 async def custom_500_handler(request: Request, exc: HTTPException):
-    return templates.TemplateResponse\
-    (
-        "500.html",
-        {"request": request, "path": request.url.path},
-        status_code=500
-    )
+    return error_pages.response(request, "500.html", status_code=500)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
@@ -12,6 +12,13 @@ async def admin_panel(request: Request):
     """
     return await AdminService.get_admin_panel(request)
 
+@router.get("/cache-stats")
+async def cache_stats(request: Request):
+    """
+    Hit/miss counters of the in-process caches.
+    """
+    return await AdminService.get_cache_stats(request)
+
 @router.get("/add-category", response_class=HTMLResponse)
 async def add_category_form(request: Request):
     """
@@ -18,7 +18,7 @@ async def login(request: Request, username: str = Form(...), password: str = For
 
 @router.get("/logout", response_class=HTMLResponse)
 async def logout(request: Request):
-    return Cookies.delete_token_cookie()
+    return Cookies.delete_token_cookie(request)
 
 @router.get("/register", response_class=HTMLResponse)
 async def register_form(request: Request):
@@ -5,8 +5,8 @@ from services.categories import CategoryService
 router = APIRouter()
 
 @router.get("/{category}", response_class=HTMLResponse)
-async def get_category(request: Request, category: int):
-    return await CategoryService.get_category_by_id(request, category)
+async def get_category(request: Request, category: int, page: int = 1, sort: str = "desc"):
+    return await CategoryService.get_category_by_id(request, category, page, sort)
 
 @router.get("/{category}/new-topic", response_class=HTMLResponse)
 async def get_topic(request: Request, category: int):
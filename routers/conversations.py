@@ -21,6 +21,15 @@ async def start_new_message_post(request: Request, username: str = Form(...)):
 async def get_conversation_messages(request: Request, conversation_user_id: int):
     return await ConversationsService.get_conversation_messages(request, conversation_user_id)
 
+@router.get("/{conversation_user_id}/messages")
+async def get_messages(request: Request, conversation_user_id: int, before: int = None, after: int = None,
+                       limit: int = None):
+    return await ConversationsService.get_messages_json(request, conversation_user_id, before, after, limit)
+
+@router.get("/{conversation_user_id}/events")
+async def stream_messages(request: Request, conversation_user_id: int, after: int = None):
+    return await ConversationsService.stream_messages(request, conversation_user_id, after)
+
 @router.post("/{conversation_user_id}", response_class=HTMLResponse)
 async def send_message(request: Request, conversation_user_id: int):
     return await ConversationsService.send_message(request, conversation_user_id)
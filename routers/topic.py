@@ -6,8 +6,8 @@ from services.topic import TopicService
 router = APIRouter()
 
 @router.get("/{topic_id}", response_class=HTMLResponse)
-async def get_topic(request: Request, topic_id: int, success: str = None):
-    return await TopicService.get_topic(request, topic_id, success)
+async def get_topic(request: Request, topic_id: int, success: str = None, page: int = 1):
+    return await TopicService.get_topic(request, topic_id, success, page)
 
 @router.get("/{topic_id}/reply", response_class=HTMLResponse)
 async def get_reply_form(request: Request, topic_id: int):
@@ -22,7 +22,7 @@ async def mark_best_reply(request: Request, topic_id: int, reply_id: int):
     return await TopicService.mark_best_reply(request, reply_id, topic_id)
 
 @router.post("/{topic_id}/vote/{reply_id}", response_class=HTMLResponse)
-async def vote_reply(request: Request, topic_id: int, reply_id: int):
+async def vote_reply(request: Request, topic_id: int, reply_id: int, page: int = None):
     form_data = await request.form()
     vote_type = int(form_data.get("vote_type", "0"))
-    return await TopicService.vote_reply(request, reply_id, topic_id, vote_type)
+    return await TopicService.vote_reply(request, reply_id, topic_id, vote_type, page)
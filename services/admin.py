@@ -1,10 +1,14 @@
 from fastapi import Request, Form
-import httpx
 
+from services.api_client import ApiClient
 from services.auth import AuthService
+from services.categories import CategoryService
 from services.cookies import Cookies
-from services.errors import not_authorized, not_found
+from services.errors import ForumError, not_authorized, not_found
+from services.fragment_cache import fragment_cache
 from services.jinja import templates
+from services.permissions import PermissionService
+from services.topic import TopicService
 
 
 class AdminService:
@@ -19,6 +23,17 @@ class AdminService:
             raise not_authorized
         return user_data
 
+    @classmethod
+    async def _get_categories(cls, token):
+        """
+        Get all categories for the admin forms.
+        Raises not_authorized if they can't be fetched.
+        """
+        try:
+            return await CategoryService.get_all_categories(token)
+        except ForumError:
+            raise not_authorized
+
     @classmethod
     async def get_admin_panel(cls, request):
         """
@@ -80,6 +95,25 @@ class AdminService:
             headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
         )
 
+    @classmethod
+    async def get_cache_stats(cls, request):
+        """
+        Get hit/miss counters of the in-process caches and of request coalescing.
+        """
+        await cls.verify_admin(request)
+
+        return {
+            "users": AuthService.user_cache.stats(),
+            "permissions": PermissionService.permission_cache.stats(),
+            "categories": CategoryService.category_cache.stats(),
+            "topic_counts": CategoryService.topic_count_cache.stats(),
+            "replies": TopicService.reply_cache.stats(),
+            "best_replies": TopicService.best_reply_cache.stats(),
+            "fragments": fragment_cache.stats(),
+            "api_validators": ApiClient.validator_cache.stats(),
+            "api_single_flight": ApiClient.single_flight.stats(),
+        }
+
     @classmethod
     async def get_add_category_form(cls, request):
         """
@@ -110,33 +144,14 @@ class AdminService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Make the API request to add the category
-        async with httpx.AsyncClient() as client:
-            headers = {"Content-Type": "application/json", "Authorization": token}
-            response = await client.post(
-                f"http://172.245.56.116:8000/categories/add",
-                json={"name": name, "description": description},
-                headers=headers
-            )
+        response = await ApiClient.add_category(token, name, description)
 
-            # Check if the request was successful
-            if response.status_code != 200:
-                data = user_data | {
-                    "request": request,
-                    "title": "Add Category - Forum API Frontend",
-                    "message": f"Failed to add category: {response.text}"
-                }
-                return templates.TemplateResponse(
-                    "add_category.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            user_data = await AuthService.get_user_data_from_cookie(request)
+        # Check if the request was successful
+        if response.status_code != 200:
             data = user_data | {
                 "request": request,
                 "title": "Add Category - Forum API Frontend",
-                "message": "Category successfully created!",
-                "success": True
+                "message": f"Failed to add category: {response.text}"
             }
             return templates.TemplateResponse(
                 "add_category.html",
@@ -144,6 +159,22 @@ class AdminService:
                 headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
             )
 
+        # The cached category list doesn't contain the new category yet
+        CategoryService.invalidate_category()
+
+        user_data = await AuthService.get_user_data_from_cookie(request)
+        data = user_data | {
+            "request": request,
+            "title": "Add Category - Forum API Frontend",
+            "message": "Category successfully created!",
+            "success": True
+        }
+        return templates.TemplateResponse(
+            "add_category.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
+
     @classmethod
     async def get_category_hidden_status_form(cls, request):
         """
@@ -154,30 +185,20 @@ class AdminService:
         # Get the authentication token
         token = Cookies.get_access_token_from_cookie(request)
 
-        # Fetch all categories from the API
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                raise not_authorized
+        # Fetch all categories
+        categories = await cls._get_categories(token)
 
-            categories = response.json()
-
-            data = user_data | {
-                "request": request,
-                "title": "Category Hidden Status - Forum API Frontend",
-                "categories": categories
-            }
+        data = user_data | {
+            "request": request,
+            "title": "Category Hidden Status - Forum API Frontend",
+            "categories": categories
+        }
 
-            return templates.TemplateResponse(
-                "category_hidden_status.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        return templates.TemplateResponse(
+            "category_hidden_status.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def update_category_hidden_status(cls, request, category_id: int, hidden: bool = False):
@@ -194,48 +215,25 @@ class AdminService:
         hidden_value = 1 if hidden else 0
 
         # Make the API request to update the category's hidden status
-        async with httpx.AsyncClient() as client:
-            headers = {"Content-Type": "application/json", "Authorization": token}
-            response = await client.put(
-                f"http://172.245.56.116:8000/categories/hide-status",
-                json={"category_id": category_id, "hidden": hidden_value},
-                headers=headers
-            )
+        response = await ApiClient.update_category_hidden(token, category_id, hidden_value)
 
-            # Fetch all categories again to display the updated list
-            categories_response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
+        if response.status_code == 200:
+            # Cached permission decisions and details for this category are now stale
+            PermissionService.invalidate_permissions(category_id)
+            CategoryService.invalidate_category(category_id)
+
+        # Fetch all categories again to display the updated list
+        categories = await cls._get_categories(token)
+        user_data = await AuthService.get_user_data_from_cookie(request)
 
-            if categories_response.status_code != 200:
-                raise not_authorized
-
-            categories = categories_response.json()
-            user_data = await AuthService.get_user_data_from_cookie(request)
-
-            # Check if the update request was successful
-            if response.status_code != 200:
-                # If not, return the form with an error message
-                data = user_data | {
-                    "request": request,
-                    "title": "Category Hidden Status - Forum API Frontend",
-                    "categories": categories,
-                    "message": f"Failed to update category hidden status: {response.text}"
-                }
-                return templates.TemplateResponse(
-                    "category_hidden_status.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            # If successful, return the form with a success message
+        # Check if the update request was successful
+        if response.status_code != 200:
+            # If not, return the form with an error message
             data = user_data | {
                 "request": request,
                 "title": "Category Hidden Status - Forum API Frontend",
                 "categories": categories,
-                "message": "Category hidden status successfully updated!",
-                "success": True
+                "message": f"Failed to update category hidden status: {response.text}"
             }
             return templates.TemplateResponse(
                 "category_hidden_status.html",
@@ -243,6 +241,20 @@ class AdminService:
                 headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
             )
 
+        # If successful, return the form with a success message
+        data = user_data | {
+            "request": request,
+            "title": "Category Hidden Status - Forum API Frontend",
+            "categories": categories,
+            "message": "Category hidden status successfully updated!",
+            "success": True
+        }
+        return templates.TemplateResponse(
+            "category_hidden_status.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
+
     @classmethod
     async def get_category_lock_form(cls, request):
         """
@@ -253,30 +265,20 @@ class AdminService:
         # Get the authentication token
         token = Cookies.get_access_token_from_cookie(request)
 
-        # Fetch all categories from the API
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                raise not_authorized
+        # Fetch all categories
+        categories = await cls._get_categories(token)
 
-            categories = response.json()
-
-            data = user_data | {
-                "request": request,
-                "title": "Lock Category - Forum API Frontend",
-                "categories": categories
-            }
+        data = user_data | {
+            "request": request,
+            "title": "Lock Category - Forum API Frontend",
+            "categories": categories
+        }
 
-            return templates.TemplateResponse(
-                "category_lock.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        return templates.TemplateResponse(
+            "category_lock.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def update_category_lock(cls, request, category_id: int):
@@ -290,46 +292,25 @@ class AdminService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Make the API request to lock the category
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"http://172.245.56.116:8000/categories/{category_id}/lock",
-                headers={"Content-Type": "application/json", "Authorization": token}
-            )
+        response = await ApiClient.lock_category(token, category_id)
 
-            # Fetch all categories again to display the updated list
-            categories_response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
+        if response.status_code == 200:
+            # Cached permission decisions and details for this category are now stale
+            PermissionService.invalidate_permissions(category_id)
+            CategoryService.invalidate_category(category_id)
+
+        # Fetch all categories again to display the updated list
+        categories = await cls._get_categories(token)
+        user_data = await AuthService.get_user_data_from_cookie(request)
 
-            if categories_response.status_code != 200:
-                raise not_authorized
-
-            categories = categories_response.json()
-            user_data = await AuthService.get_user_data_from_cookie(request)
-
-            # Check if the update request was successful
-            if response.status_code != 200:
-                # If not, return the form with an error message
-                data = user_data | {
-                    "request": request,
-                    "title": "Lock Category - Forum API Frontend",
-                    "categories": categories,
-                    "message": f"Failed to lock category: {response.text}"
-                }
-                return templates.TemplateResponse(
-                    "category_lock.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            # If successful, return the form with a success message
+        # Check if the update request was successful
+        if response.status_code != 200:
+            # If not, return the form with an error message
             data = user_data | {
                 "request": request,
                 "title": "Lock Category - Forum API Frontend",
                 "categories": categories,
-                "message": "Category successfully locked!",
-                "success": True
+                "message": f"Failed to lock category: {response.text}"
             }
             return templates.TemplateResponse(
                 "category_lock.html",
@@ -337,6 +318,20 @@ class AdminService:
                 headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
             )
 
+        # If successful, return the form with a success message
+        data = user_data | {
+            "request": request,
+            "title": "Lock Category - Forum API Frontend",
+            "categories": categories,
+            "message": "Category successfully locked!",
+            "success": True
+        }
+        return templates.TemplateResponse(
+            "category_lock.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
+
     @classmethod
     async def get_topic_lock_form(cls, request):
         """
@@ -367,34 +362,17 @@ class AdminService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Make the API request to lock the topic
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"http://172.245.56.116:8000/topics/{topic_id}/lock",
-                headers={"Content-Type": "application/json", "Authorization": token}
-            )
+        response = await ApiClient.lock_topic(token, topic_id)
 
-            user_data = await AuthService.get_user_data_from_cookie(request)
-
-            # Check if the update request was successful
-            if response.status_code != 200:
-                # If not, return the form with an error message
-                data = user_data | {
-                    "request": request,
-                    "title": "Lock Topic - Forum API Frontend",
-                    "message": f"Failed to lock topic: {response.text}"
-                }
-                return templates.TemplateResponse(
-                    "topic_lock.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            # If successful, return the form with a success message
+        user_data = await AuthService.get_user_data_from_cookie(request)
+
+        # Check if the update request was successful
+        if response.status_code != 200:
+            # If not, return the form with an error message
             data = user_data | {
                 "request": request,
                 "title": "Lock Topic - Forum API Frontend",
-                "message": "Topic successfully locked!",
-                "success": True
+                "message": f"Failed to lock topic: {response.text}"
             }
             return templates.TemplateResponse(
                 "topic_lock.html",
@@ -402,6 +380,19 @@ class AdminService:
                 headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
             )
 
+        # If successful, return the form with a success message
+        data = user_data | {
+            "request": request,
+            "title": "Lock Topic - Forum API Frontend",
+            "message": "Topic successfully locked!",
+            "success": True
+        }
+        return templates.TemplateResponse(
+            "topic_lock.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
+
     @classmethod
     async def get_update_privileges_form(cls, request):
         """
@@ -412,30 +403,20 @@ class AdminService:
         # Get the authentication token
         token = Cookies.get_access_token_from_cookie(request)
 
-        # Fetch all categories from the API
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                raise not_authorized
+        # Fetch all categories
+        categories = await cls._get_categories(token)
 
-            categories = response.json()
-
-            data = user_data | {
-                "request": request,
-                "title": "Update User Category Privileges - Forum API Frontend",
-                "categories": categories
-            }
+        data = user_data | {
+            "request": request,
+            "title": "Update User Category Privileges - Forum API Frontend",
+            "categories": categories
+        }
 
-            return templates.TemplateResponse(
-                "update_privileges.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        return templates.TemplateResponse(
+            "update_privileges.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def update_user_privileges(cls, request, category_id: int, user_id: int, permissions: int):
@@ -449,48 +430,24 @@ class AdminService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Make the API request to update user permissions
-        async with httpx.AsyncClient() as client:
-            headers = {"Content-Type": "application/json", "Authorization": token}
-            response = await client.put(
-                f"http://172.245.56.116:8000/categories/user-permissions",
-                json={"category_id": category_id, "user_id": user_id, "permission": permissions},
-                headers=headers
-            )
+        response = await ApiClient.update_user_permissions(token, category_id, user_id, permissions)
 
-            # Fetch all categories again to display the updated list
-            categories_response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
+        if response.status_code == 200:
+            # The user's cached permission for this category is now stale
+            PermissionService.invalidate_permissions(category_id, user_id)
 
-            if categories_response.status_code != 200:
-                raise not_authorized
-
-            categories = categories_response.json()
-            user_data = await AuthService.get_user_data_from_cookie(request)
-
-            # Check if the update request was successful
-            if response.status_code != 200:
-                # If not, return the form with an error message
-                data = user_data | {
-                    "request": request,
-                    "title": "Update User Category Privileges - Forum API Frontend",
-                    "categories": categories,
-                    "message": f"Failed to update user permissions: {response.text}"
-                }
-                return templates.TemplateResponse(
-                    "update_privileges.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            # If successful, return the form with a success message
+        # Fetch all categories again to display the updated list
+        categories = await cls._get_categories(token)
+        user_data = await AuthService.get_user_data_from_cookie(request)
+
+        # Check if the update request was successful
+        if response.status_code != 200:
+            # If not, return the form with an error message
             data = user_data | {
                 "request": request,
                 "title": "Update User Category Privileges - Forum API Frontend",
                 "categories": categories,
-                "message": "User permissions successfully updated!",
-                "success": True
+                "message": f"Failed to update user permissions: {response.text}"
             }
             return templates.TemplateResponse(
                 "update_privileges.html",
@@ -498,68 +455,65 @@ class AdminService:
                 headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
             )
 
+        # If successful, return the form with a success message
+        data = user_data | {
+            "request": request,
+            "title": "Update User Category Privileges - Forum API Frontend",
+            "categories": categories,
+            "message": "User permissions successfully updated!",
+            "success": True
+        }
+        return templates.TemplateResponse(
+            "update_privileges.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
+
     @classmethod
     async def get_view_privileged_users_form(cls, request):
         user_data = await cls.verify_admin(request)
         token = Cookies.get_access_token_from_cookie(request)
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
-            if response.status_code != 200:
-                raise not_authorized
-            categories = response.json()
-            data = user_data | {
-                "request": request,
-                "title": "View Privileged Users - Forum API Frontend",
-                "categories": categories
-            }
-            return templates.TemplateResponse(
-                "view_privileged_users_form.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        categories = await cls._get_categories(token)
+        data = user_data | {
+            "request": request,
+            "title": "View Privileged Users - Forum API Frontend",
+            "categories": categories
+        }
+        return templates.TemplateResponse(
+            "view_privileged_users_form.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def view_privileged_users(cls, request, category_id: int):
         user_data = await cls.verify_admin(request)
         token = Cookies.get_access_token_from_cookie(request)
-        async with httpx.AsyncClient() as client:
-            # Get categories for the dropdown
-            categories_response = await client.get(
-                f"http://172.245.56.116:8000/categories/",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
-            if categories_response.status_code != 200:
-                raise not_authorized
-            categories = categories_response.json()
-            # Get privileged users for the selected category
-            response = await client.get(
-                f"http://172.245.56.116:8000/categories/{category_id}/privileged-users",
-                headers={"Cache-Control": "no-cache", "Authorization": token}
-            )
-            privileged_users = []
-            if response.status_code == 200:
-                privileged_users = response.json()
-            # Permission mapping
-            permission_map = {
-                0: "No Access",
-                1: "Normal Access",
-                2: "Read-Only Access",
-                3: "Write Access"
-            }
-            for entry in privileged_users:
-                entry["permission_text"] = permission_map.get(entry["permission"], str(entry["permission"]))
-            data = user_data | {
-                "request": request,
-                "title": "View Privileged Users - Forum API Frontend",
-                "categories": categories,
-                "selected_category_id": category_id,
-                "privileged_users": privileged_users
-            }
-            return templates.TemplateResponse(
-                "view_privileged_users_result.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        # Get categories for the dropdown
+        categories = await cls._get_categories(token)
+        # Get privileged users for the selected category
+        response = await ApiClient.list_privileged_users(token, category_id)
+        privileged_users = []
+        if response.status_code == 200:
+            privileged_users = response.json()
+        # Permission mapping
+        permission_map = {
+            0: "No Access",
+            1: "Normal Access",
+            2: "Read-Only Access",
+            3: "Write Access"
+        }
+        for entry in privileged_users:
+            entry["permission_text"] = permission_map.get(entry["permission"], str(entry["permission"]))
+        data = user_data | {
+            "request": request,
+            "title": "View Privileged Users - Forum API Frontend",
+            "categories": categories,
+            "selected_category_id": category_id,
+            "privileged_users": privileged_users
+        }
+        return templates.TemplateResponse(
+            "view_privileged_users_result.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
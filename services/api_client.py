@@ -0,0 +1,306 @@
+import httpx
+
+from services import config
+from services.cache import TTLCache
+from services.concurrency import SingleFlight
+from services.http_client import HttpClient
+
+
+class CachedResponse(httpx.Response):
+    """
+    Backend response kept for conditional GETs.
+
+    The JSON body is decoded once and the same object is returned by every
+    json() call afterwards, so callers must not modify it.
+    """
+    _MISSING = object()
+    _json = _MISSING
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "CachedResponse":
+        # The body is already decoded, so it must not be decoded again
+        headers = [(name, value) for name, value in response.headers.multi_items()
+                   if name.lower() not in ("content-encoding", "content-length")]
+        return cls(response.status_code, headers=headers, content=response.content, request=response.request)
+
+    def json(self, **kwargs):
+        if kwargs:
+            return super().json(**kwargs)
+        if self._json is self._MISSING:
+            self._json = super().json()
+        return self._json
+
+
+class ApiClient:
+    """
+    Typed access to the forum backend API over the shared HTTP client.
+
+    Every backend call goes through request(), which adds the base URL, the
+    default headers, the timeout and retries of idempotent requests.
+
+    Identical GET requests that are in flight at the same time are sent to the
+    backend only once (see get()). Large listings are fetched with conditional
+    GETs so an unchanged body is neither downloaded nor decoded again.
+    """
+    single_flight = SingleFlight()
+    # Last 200 response with an ETag or Last-Modified validator, by GET key
+    validator_cache = TTLCache(
+        maxsize=config.API_VALIDATOR_CACHE_MAXSIZE,
+        ttl=config.API_VALIDATOR_CACHE_TTL
+    )
+
+    @classmethod
+    def _headers(cls, token: str = None) -> dict:
+        headers = {"Cache-Control": "no-cache"}
+        if token:
+            headers["Authorization"] = token
+        return headers
+
+    @classmethod
+    async def request(cls, method: str, path: str, token: str = None, *,
+                      params: dict = None, json=None, headers: dict = None) -> httpx.Response:
+        """
+        Send a request to the backend API.
+
+        GET requests are retried on connection errors and timeouts up to
+        config.API_RETRIES times; other methods are sent only once.
+        """
+        url = f"{config.API_BASE_URL}{path}"
+        retries = config.API_RETRIES if method == "GET" else 0
+
+        async with HttpClient.session() as client:
+            for attempt in range(retries + 1):
+                try:
+                    return await client.request(
+                        method, url,
+                        params=params,
+                        json=json,
+                        headers=cls._headers(token) | (headers or {}),
+                        timeout=config.API_TIMEOUT
+                    )
+                except httpx.TransportError:
+                    if attempt == retries:
+                        raise
+
+    @classmethod
+    async def get(cls, path: str, token: str = None, *, params: dict = None,
+                  public: bool = False, conditional: bool = False) -> httpx.Response:
+        """
+        Send a GET request, sharing the response with identical concurrent GETs.
+
+        Requests are only shared between callers with the same token, unless
+        public is set for resources that look the same to every user.
+        With conditional set, the request is revalidated against the last
+        response instead of downloading it again (see _conditional_get()).
+        The shared httpx.Response must be treated as read-only.
+        """
+        scope = None if public else token
+        key = (path, tuple(sorted((params or {}).items())), scope)
+
+        if conditional and config.API_CONDITIONAL_GET:
+            send = lambda: cls._conditional_get(key, path, token, params)
+        else:
+            send = lambda: cls.request("GET", path, token, params=params)
+
+        if not config.API_SINGLE_FLIGHT:
+            return await send()
+        return await cls.single_flight.do(key, send)
+
+    @classmethod
+    async def _conditional_get(cls, key, path: str, token: str = None, params: dict = None) -> httpx.Response:
+        """
+        Send a GET with If-None-Match / If-Modified-Since from the last response.
+
+        On 304 Not Modified the stored response (and its decoded JSON) is
+        returned. Responses without validators are not stored.
+        """
+        cached = cls.validator_cache.get(key)
+        headers = {}
+        if cached is not None:
+            if "ETag" in cached.headers:
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if "Last-Modified" in cached.headers:
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = await cls.request("GET", path, token, params=params, headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            cls.validator_cache.set(key, cached)
+            return cached
+
+        if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            response = CachedResponse.from_response(response)
+            cls.validator_cache.set(key, response)
+        else:
+            cls.validator_cache.invalidate(key)
+
+        return response
+
+    @classmethod
+    async def post(cls, path: str, token: str = None, *, json=None) -> httpx.Response:
+        return await cls.request("POST", path, token, json=json)
+
+    @classmethod
+    async def put(cls, path: str, token: str = None, *, params: dict = None, json=None) -> httpx.Response:
+        return await cls.request("PUT", path, token, params=params, json=json)
+
+    # Auth and users
+
+    @classmethod
+    async def login(cls, username: str, password: str) -> httpx.Response:
+        return await cls.post("/auth/login", json={"username": username, "password": password})
+
+    @classmethod
+    async def register(cls, username: str, password: str, email: str, birthday: str) -> httpx.Response:
+        return await cls.post("/auth/register", json={
+            "username": username,
+            "password": password,
+            "email": email,
+            "birthday": birthday
+        })
+
+    @classmethod
+    async def get_current_user(cls, token: str) -> httpx.Response:
+        return await cls.get("/users/me", token)
+
+    @classmethod
+    async def get_user(cls, token: str, user_id: int) -> httpx.Response:
+        return await cls.get(f"/users/{user_id}", token)
+
+    @classmethod
+    async def search_user(cls, token: str, username: str) -> httpx.Response:
+        return await cls.get(f"/users/search/{username}", token)
+
+    @classmethod
+    async def update_avatar(cls, token: str, link: str) -> httpx.Response:
+        return await cls.put("/users/avatar/", token, params={"link": link})
+
+    # Categories
+    # Category metadata is the same for every user (see CategoryService.category_cache)
+
+    @classmethod
+    async def list_categories(cls, token: str) -> httpx.Response:
+        return await cls.get("/categories/", token, public=True)
+
+    @classmethod
+    async def get_category(cls, token: str, category_id: int) -> httpx.Response:
+        return await cls.get(f"/categories/{category_id}", token, public=True)
+
+    @classmethod
+    async def list_category_topics(cls, token: str, category_id: int, offset: int = 0, limit: int = None,
+                                   sort: str = None) -> httpx.Response:
+        """
+        Topics of a category; offset/limit/sort ask for one sorted slice of them, which not every
+        backend version honours.
+        """
+        params = {"offset": offset, "limit": limit, "sort": sort} if limit is not None else None
+        return await cls.get(f"/categories/{category_id}/topics", token, params=params, conditional=True)
+
+    @classmethod
+    async def check_permission(cls, token: str, category_id: int) -> httpx.Response:
+        return await cls.get(f"/categories/{category_id}/check-permission", token)
+
+    @classmethod
+    async def check_permissions(cls, token: str, category_ids: list[int]) -> httpx.Response:
+        """
+        Bulk permission check; not every backend version provides this endpoint.
+        """
+        return await cls.get("/categories/check-permissions", token,
+                             params={"category_ids": ",".join(str(category_id) for category_id in category_ids)})
+
+    @classmethod
+    async def add_category(cls, token: str, name: str, description: str) -> httpx.Response:
+        return await cls.post("/categories/add", token, json={"name": name, "description": description})
+
+    @classmethod
+    async def update_category_hidden(cls, token: str, category_id: int, hidden: int) -> httpx.Response:
+        return await cls.put("/categories/hide-status", token, json={"category_id": category_id, "hidden": hidden})
+
+    @classmethod
+    async def lock_category(cls, token: str, category_id: int) -> httpx.Response:
+        return await cls.put(f"/categories/{category_id}/lock", token)
+
+    @classmethod
+    async def update_user_permissions(cls, token: str, category_id: int, user_id: int,
+                                      permission: int) -> httpx.Response:
+        return await cls.put("/categories/user-permissions", token,
+                             json={"category_id": category_id, "user_id": user_id, "permission": permission})
+
+    @classmethod
+    async def list_privileged_users(cls, token: str, category_id: int) -> httpx.Response:
+        return await cls.get(f"/categories/{category_id}/privileged-users", token)
+
+    # Topics and replies
+
+    @classmethod
+    async def search_topics(cls, token: str, search: str, page: int, sort: str) -> httpx.Response:
+        return await cls.get("/topics/", token, params={"search": search, "page": page, "sort": sort})
+
+    @classmethod
+    async def get_topic(cls, token: str, topic_id: int) -> httpx.Response:
+        return await cls.get(f"/topics/{topic_id}", token)
+
+    @classmethod
+    async def create_topic(cls, token: str, name: str, content: str, category_id: int) -> httpx.Response:
+        return await cls.post("/topics/", token, json={"name": name, "content": content, "category_id": category_id})
+
+    @classmethod
+    async def lock_topic(cls, token: str, topic_id: int) -> httpx.Response:
+        return await cls.put(f"/topics/{topic_id}/lock", token)
+
+    @classmethod
+    async def list_replies(cls, token: str, topic_id: int, offset: int = 0, limit: int = None) -> httpx.Response:
+        """
+        Replies of a topic; offset/limit ask for one slice of them, which not every backend version honours.
+        """
+        params = {"offset": offset, "limit": limit} if limit is not None else None
+        return await cls.get(f"/topics/{topic_id}/replies", token, params=params, conditional=True)
+
+    @classmethod
+    async def post_reply(cls, token: str, topic_id: int, content: str) -> httpx.Response:
+        return await cls.post(f"/replies/{topic_id}", token, json={"content": content})
+
+    @classmethod
+    async def get_vote(cls, token: str, reply_id: int) -> httpx.Response:
+        return await cls.get(f"/replies/vote/{reply_id}", token)
+
+    @classmethod
+    async def vote_reply(cls, token: str, reply_id: int, vote_type: int) -> httpx.Response:
+        return await cls.put(f"/replies/vote/{reply_id}", token, json={"vote_type": vote_type})
+
+    @classmethod
+    async def mark_best_reply(cls, token: str, topic_id: int, reply_id: int) -> httpx.Response:
+        return await cls.put(f"/replies/best/{topic_id}/{reply_id}", token)
+
+    # Conversations
+
+    @classmethod
+    async def list_conversations(cls, token: str) -> httpx.Response:
+        return await cls.get("/conversations/", token)
+
+    @classmethod
+    async def get_last_message(cls, token: str, user_id: int) -> httpx.Response:
+        return await cls.get(f"/conversations/last-message/{user_id}", token)
+
+    @classmethod
+    async def get_last_messages(cls, token: str, user_ids: list[int]) -> httpx.Response:
+        """
+        Bulk last-message lookup; not every backend version provides this endpoint.
+        """
+        return await cls.get("/conversations/last-messages", token,
+                             params={"user_ids": ",".join(str(user_id) for user_id in user_ids)})
+
+    @classmethod
+    async def get_messages(cls, token: str, user_id: int, before: int = None, after: int = None,
+                           limit: int = None) -> httpx.Response:
+        """
+        Messages of a conversation; before/after (message ids) and limit ask for one slice of them,
+        which not every backend version honours.
+        """
+        params = {name: value for name, value in (("before", before), ("after", after), ("limit", limit))
+                  if value is not None}
+        return await cls.get(f"/conversations/msg/{user_id}", token, params=params or None, conditional=True)
+
+    @classmethod
+    async def send_message(cls, token: str, receiver_id: int, content: str) -> httpx.Response:
+        return await cls.post("/conversations/messages/", token, json={"content": content, "receiver_id": receiver_id})
@@ -1,35 +1,77 @@
+import asyncio
+import hashlib
+
 import httpx
 from fastapi import HTTPException
 from fastapi.responses import RedirectResponse
 
+from services import config
+from services.api_client import ApiClient
+from services.cache import TTLCache
 from services.cookies import Cookies
 from services.errors import not_authorized
 from services.jinja import templates
 
 
 class AuthService:
+    # Profiles returned by /users/me, keyed by a hash of the access token
+    user_cache = TTLCache(maxsize=config.USER_CACHE_MAXSIZE, ttl=config.USER_CACHE_TTL)
+
+    @classmethod
+    def _user_cache_key(cls, access_token: str) -> str:
+        return hashlib.sha256(access_token.encode()).hexdigest()
+
+    @classmethod
+    def invalidate_user_cache(cls, access_token: str):
+        """
+        Forget the cached profile for a token, e.g. on logout or profile changes.
+        """
+        if access_token:
+            cls.user_cache.invalidate(cls._user_cache_key(access_token))
 
     @classmethod
     async def get_user_data_from_cookie(cls, request) -> dict:
+        """
+        Resolve the current user, calling /users/me at most once per HTTP request.
+
+        The lookup is stored on request.state so every service handling the same
+        request shares it. Each caller receives its own copy of the user dict.
+        Waiters are shielded, so a cancelled caller doesn't cancel the lookup
+        for everyone else.
+        """
+        state = request.state
+        lookup = getattr(state, "user_data_lookup", None)
+        if lookup is None:
+            lookup = asyncio.ensure_future(cls._fetch_user_data(request))
+            state.user_data_lookup = lookup
+            state.user_data_fetches = getattr(state, "user_data_fetches", 0) + 1
+        state.user_data_calls = getattr(state, "user_data_calls", 0) + 1
+
+        return dict(await asyncio.shield(lookup))
+
+    @classmethod
+    async def _fetch_user_data(cls, request) -> dict:
         access_token = Cookies.get_access_token_from_cookie(request)
         is_authenticated = access_token is not None
 
         data = {"is_authenticated": False, "admin": False}
         if is_authenticated:
-            async with httpx.AsyncClient() as client:
-                headers = {"Cache-Control": "no-cache",
-                           "Authorization": access_token}
-                response = await client.get(f"http://172.245.56.116:8000/users/me",
-                                            headers=headers,)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    data["is_authenticated"] = True
-                    data["admin"] = True if data["admin"] > 0 else False
-                    return data
-                else:
-                    raise HTTPException(status_code=response.status_code, detail="Error fetching user data: "\
-                                        + response.text)
+            cache_key = cls._user_cache_key(access_token)
+            cached = cls.user_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            response = await ApiClient.get_current_user(access_token)
+
+            if response.status_code == 200:
+                data = response.json()
+                data["is_authenticated"] = True
+                data["admin"] = True if data["admin"] > 0 else False
+                cls.user_cache.set(cache_key, data)
+                return data
+            else:
+                raise HTTPException(status_code=response.status_code, detail="Error fetching user data: "\
+                                    + response.text)
         return data
 
     @classmethod
@@ -62,55 +104,46 @@ class AuthService:
         if data["is_authenticated"]:
             return RedirectResponse(url="/", status_code=303)
 
-        api_url = "http://172.245.56.116:8000/auth/login"
-
         try:
-            async with httpx.AsyncClient() as client:
-                login_data = {"username": username, "password": password}
-
-                # Make POST request to API
-                response = await client.post(
-                    api_url,
-                    json=login_data,
-                    headers={"Content-Type": "application/json"}
-                )
+            # Make POST request to API
+            response = await ApiClient.login(username, password)
 
-                if response.status_code == 200:
-                    auth_data = response.json()
-                    access_token = auth_data.get("access_token")
-                    token_type = auth_data.get("token_type")
-
-                    if not access_token or token_type != "bearer":
-                        return templates.TemplateResponse(
-                            "login.html",
-                            {
-                                "request": request,
-                                "message": "Invalid token data received",
-                                "title": "Login - Forum API Frontend"
-                            },
-                            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                        )
-
-                    redirect_response = RedirectResponse(url="/", status_code=303)
-                    Cookies.set_token_cookie(redirect_response, access_token)
-                    return redirect_response
-                else:
-                    try:
-                        error_data = response.json()
-                        error_message = error_data.get("message", f"Login failed: {error_data.get("detail")}")
-                    except ValueError:
-                        error_message = f"Login failed: Invalid credentials or server error."
+            if response.status_code == 200:
+                auth_data = response.json()
+                access_token = auth_data.get("access_token")
+                token_type = auth_data.get("token_type")
 
+                if not access_token or token_type != "bearer":
                     return templates.TemplateResponse(
                         "login.html",
                         {
                             "request": request,
-                            "message": error_message,
+                            "message": "Invalid token data received",
                             "title": "Login - Forum API Frontend"
                         },
                         headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
                     )
 
+                redirect_response = RedirectResponse(url="/", status_code=303)
+                Cookies.set_token_cookie(redirect_response, access_token)
+                return redirect_response
+            else:
+                try:
+                    error_data = response.json()
+                    error_message = error_data.get("message", f"Login failed: {error_data.get("detail")}")
+                except ValueError:
+                    error_message = f"Login failed: Invalid credentials or server error."
+
+                return templates.TemplateResponse(
+                    "login.html",
+                    {
+                        "request": request,
+                        "message": error_message,
+                        "title": "Login - Forum API Frontend"
+                    },
+                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+                )
+
         except httpx.RequestError as e:
             return templates.TemplateResponse(
                 "login.html",
@@ -140,41 +173,27 @@ class AuthService:
         if data["is_authenticated"]:
             return RedirectResponse(url="/", status_code=303)
 
-        api_url = "http://172.245.56.116:8000/auth/register"
-
         try:
-            async with httpx.AsyncClient() as client:
-                registration_data = {
-                    "username": username,
-                    "password": password,
-                    "email": email,
-                    "birthday": birthdate
-                }
-
-                response = await client.post(
-                    api_url,
-                    json=registration_data,
-                    headers={"Content-Type": "application/json"}
-                )
+            response = await ApiClient.register(username, password, email, birthdate)
 
-                if response.status_code == 200:
-                    return RedirectResponse(url="/auth/login?success=true", status_code=303)
+            if response.status_code == 200:
+                return RedirectResponse(url="/auth/login?success=true", status_code=303)
 
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get("message", error_data["detail"])
-                except ValueError:
-                    error_message = f"Registration failed: {response.status_code}"
+            try:
+                error_data = response.json()
+                error_message = error_data.get("message", error_data["detail"])
+            except ValueError:
+                error_message = f"Registration failed: {response.status_code}"
 
-                return templates.TemplateResponse(
-                    "register.html",
-                    {
-                        "request": request,
-                        "message": error_message,
-                        "title": "Register - Forum API Frontend"
-                    },
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
+            return templates.TemplateResponse(
+                "register.html",
+                {
+                    "request": request,
+                    "message": error_message,
+                    "title": "Register - Forum API Frontend"
+                },
+                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+            )
 
         except httpx.RequestError as e:
             return templates.TemplateResponse(
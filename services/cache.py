@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a time-to-live.
+
+    Not shared between worker processes; every process keeps its own copy.
+
+    With a stale_ttl, get_or_load() keeps serving an expired entry for that much
+    longer while it is refreshed in the background (stale-while-revalidate).
+    """
+    _MISSING = object()
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, self._MISSING)
+        if entry is self._MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling loader() to fill the cache on a miss.
+
+        Exceptions raised by loader() propagate and nothing is cached.
+        """
+        entry = self._data.get(key, self._MISSING)
+        if entry is not self._MISSING:
+            expires_at, value = entry
+            now = time.monotonic()
+            if now < expires_at:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if now < expires_at + self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale_hits += 1
+                self._revalidate(key, loader)
+                return value
+
+            del self._data[key]
+
+        self.misses += 1
+        value = await loader()
+        self.set(key, value)
+        return value
+
+    def _revalidate(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                self.set(key, await loader())
+            except Exception:
+                # Keep serving the stale value until it runs out
+                pass
+            finally:
+                if self._refreshing.get(key) is asyncio.current_task():
+                    del self._refreshing[key]
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+        self._cancel_refresh(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+        for key in [key for key in self._refreshing if predicate(key)]:
+            self._cancel_refresh(key)
+
+    def clear(self):
+        self._data.clear()
+        for key in list(self._refreshing):
+            self._cancel_refresh(key)
+
+    def _cancel_refresh(self, key: Hashable):
+        # A refresh started before the invalidation could write back outdated data
+        task = self._refreshing.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
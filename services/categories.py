@@ -1,17 +1,87 @@
+
 import httpx
 from fastapi.responses import RedirectResponse
 
+from services import config
+from services.api_client import ApiClient
 from services.auth import AuthService
+from services.cache import TTLCache
 from services.cookies import Cookies
-from services.errors import not_authorized, not_found
+from services.errors import ForumError, not_authorized, not_found
+from services.http_cache import revalidated_page
 from services.jinja import templates
+from services.pagination import Paginator
 from services.permissions import PermissionService
 
 
 class CategoryService:
+    # Category metadata shared by all users: category id -> category, plus the full list.
+    # Cached values are shared, so callers must not modify them.
+    category_cache = TTLCache(
+        maxsize=config.CATEGORY_CACHE_MAXSIZE,
+        ttl=config.CATEGORY_CACHE_TTL,
+        stale_ttl=config.CATEGORY_CACHE_STALE_TTL
+    )
+    ALL_CATEGORIES = "all"
+
+    # Number of topics by category id, so the pager doesn't need the full topic list
+    topic_count_cache = TTLCache(maxsize=config.CATEGORY_CACHE_MAXSIZE, ttl=config.TOPIC_COUNT_CACHE_TTL)
+
+    # Pages of a category's topic list
+    topic_pages = Paginator(config.CATEGORY_PAGE_SIZE)
+
+    # Sort orders the backend turned out to ignore when asked for a page of topics
+    _unsupported_topic_sorts = set()
+
     def __init__(self):
         pass
 
+    @classmethod
+    def invalidate_category(cls, category_id=None):
+        """
+        Forget a cached category and the cached category list.
+        """
+        if category_id is not None:
+            cls.category_cache.invalidate(category_id)
+        cls.category_cache.invalidate(cls.ALL_CATEGORIES)
+
+    @classmethod
+    async def get_category_data(cls, token, category_id) -> dict:
+        """
+        Get the details of a category.
+
+        Raises not_found or not_authorized if the backend refuses the request.
+        """
+        async def load():
+            response_category = await ApiClient.get_category(token, category_id)
+
+            if response_category.status_code == 404:
+                raise not_found
+
+            if response_category.status_code != 200:
+                raise not_authorized
+
+            return response_category.json()
+
+        return await cls.category_cache.get_or_load(category_id, load)
+
+    @classmethod
+    async def get_all_categories(cls, token) -> list:
+        """
+        Get the list of all categories.
+
+        Raises a ForumError with the backend's status code if the request fails.
+        """
+        async def load():
+            response = await ApiClient.list_categories(token)
+
+            if response.status_code != 200:
+                raise ForumError(code=response.status_code, detail="Error fetching categories")
+
+            return response.json()
+
+        return await cls.category_cache.get_or_load(cls.ALL_CATEGORIES, load)
+
     @classmethod
     async def get_topic_form(cls, request, category_id):
         token = Cookies.get_access_token_from_cookie(request)
@@ -24,41 +94,31 @@ class CategoryService:
         permission_type = await PermissionService.check_category_permission(request, category_id)
 
         # Get category details to check if it's hidden
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}", headers=headers)
+        category_data = await cls.get_category_data(token, category_id)
+        category_hidden = category_data.get("hidden", False)
 
-            if response_category.status_code == 404:
-                raise not_found
-
-            if response_category.status_code != 200:
-                raise not_authorized
-
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
-
-            # Check if the user can add a topic
-            if not PermissionService.can_add_topic(permission_type, category_hidden):
-                raise not_authorized
+        # Check if the user can add a topic
+        if not PermissionService.can_add_topic(permission_type, category_hidden):
+            raise not_authorized
 
-            # Check if the user can view this category
-            if not PermissionService.can_view_category(permission_type, category_hidden):
-                raise not_authorized
+        # Check if the user can view this category
+        if not PermissionService.can_view_category(permission_type, category_hidden):
+            raise not_authorized
 
-            data["category"] = category_data
-            data["admin"] = True if data.get("admin") > 0 else False
-            data["title"] = "Add Topic - Forum API Frontend"
-            data["request"] = request
-            data["permission_type"] = permission_type
+        data["category"] = category_data
+        data["admin"] = True if data.get("admin") > 0 else False
+        data["title"] = "Add Topic - Forum API Frontend"
+        data["request"] = request
+        data["permission_type"] = permission_type
 
-            return templates.TemplateResponse(
-                "addtopic.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        return templates.TemplateResponse(
+            "addtopic.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
-    async def get_category_by_id(cls, request, category_id):
+    async def get_category_by_id(cls, request, category_id, page: int = 1, sort: str = "desc"):
         token = Cookies.get_access_token_from_cookie(request)
         data = await AuthService.get_user_data_from_cookie(request)
 
@@ -68,44 +128,97 @@ class CategoryService:
         # Check the user's permission for this category
         permission_type = await PermissionService.check_category_permission(request, category_id)
 
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}",
-                                                 headers=headers)
+        category_data = await cls.get_category_data(token, category_id)
+        category_hidden = category_data.get("hidden", False)
 
-            if response_category.status_code == 404:
-                raise not_found
+        # Check if the user can view this category
+        if not PermissionService.can_view_category(permission_type, category_hidden):
+            raise not_authorized
 
-            if response_category.status_code != 200:
-                raise not_authorized
+        # If the user can view the category, get the topics on the requested page
+        if sort not in ("asc", "desc"):
+            sort = "desc"
+        topics, page, pages, topic_count = await cls._get_topic_page(token, category_id, category_data, page, sort)
+
+        data["topics"] = topics
+        data["topic_count"] = topic_count
+        data["current_page"] = page
+        data["pages"] = pages
+        data["sort"] = sort
+        data["category"] = category_data
+        data["admin"] = True if data.get("admin") > 0 else False
+        data["title"] = "Category - Forum API Frontend"
+        data["request"] = request
+        data["permission_type"] = permission_type
+        data["can_add_topic"] = PermissionService.can_add_topic(permission_type, category_hidden)
+
+        return revalidated_page(request, templates.TemplateResponse("category.html", data))
 
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
+    @classmethod
+    async def _get_topic_page(cls, token, category_id, category_data: dict, page: int,
+                              sort: str) -> tuple[list, int, int, int]:
+        """
+        Get one page of a category's topics, newest first for sort "desc" and oldest first for "asc".
+        The page number is clamped to the pages that exist.
+
+        The number of topics comes from the category's topics_count, or from
+        topic_count_cache when the backend doesn't send it. When it is known and
+        API_PAGINATION is on, only the page is requested from the backend; otherwise
+        the full list is fetched, counted, sorted and sliced here.
+
+        Returns:
+            tuple: (topics, page, number of pages, number of topics)
+        """
+        paginator = cls.topic_pages
+        topic_count = cls._get_topic_count(category_id, category_data)
+
+        if paginator.use_backend(topic_count) and sort not in cls._unsupported_topic_sorts:
+            page, pages = paginator.clamp(page, topic_count)
+            topics = await cls._list_topics(token, category_id, offset=paginator.offset(page),
+                                            limit=paginator.page_size, sort=sort)
+            if paginator.check_page(topics):
+                ids = [topic.get("id", 0) for topic in topics]
+                if ids == sorted(ids, reverse=sort == "desc"):
+                    return topics, page, pages, topic_count
+
+                # The backend ignored the sort order, so its pages don't hold the right topics
+                cls._unsupported_topic_sorts.add(sort)
+                topics = await cls._list_topics(token, category_id)
+            # Otherwise the backend sent every topic, which are sorted and sliced below
+        else:
+            topics = await cls._list_topics(token, category_id)
+
+        cls.topic_count_cache.set(category_id, len(topics))
+        topics = sorted(topics, key=lambda topic: topic.get("id", 0), reverse=sort == "desc")
+        page_topics, page, pages = paginator.slice(topics, page)
+        return page_topics, page, pages, len(topics)
 
-            # Check if the user can view this category
-            if not PermissionService.can_view_category(permission_type, category_hidden):
-                raise not_authorized
+    @classmethod
+    def _get_topic_count(cls, category_id, category_data: dict) -> int | None:
+        """
+        Number of topics in a category, without fetching its topic list.
+
+        The category from the backend carries it as topics_count, and so does the
+        cached category list; topic_count_cache has the counts of full lists fetched here.
+        """
+        topic_count = category_data.get("topics_count")
+        if topic_count is None:
+            for category in cls.category_cache.get(cls.ALL_CATEGORIES) or []:
+                if category.get("id") == category_id:
+                    topic_count = category.get("topics_count")
+                    break
+        if topic_count is None:
+            topic_count = cls.topic_count_cache.get(category_id)
+        return topic_count
 
-            # If the user can view the category, get the topics
-            response_topics = await client.get(
-                f"http://172.245.56.116:8000/categories/{category_id}/topics", headers=headers)
+    @classmethod
+    async def _list_topics(cls, token, category_id, **params) -> list:
+        response_topics = await ApiClient.list_category_topics(token, category_id, **params)
 
-            if response_topics.status_code != 200:
-                raise not_authorized
+        if response_topics.status_code != 200:
+            raise not_authorized
 
-            data["topics"] = response_topics.json()
-            data["category"] = category_data
-            data["admin"] = True if data.get("admin") > 0 else False
-            data["title"] = "Category - Forum API Frontend"
-            data["request"] = request
-            data["permission_type"] = permission_type
-            data["can_add_topic"] = PermissionService.can_add_topic(permission_type, category_hidden)
-
-            return templates.TemplateResponse(
-                "category.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        return response_topics.json()
 
     @classmethod
     async def topic_form_post(cls, request, category_id: int):
@@ -119,22 +232,12 @@ class CategoryService:
         permission_type = await PermissionService.check_category_permission(request, category_id)
 
         # Get category details to check if it's hidden
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}", headers=headers)
-
-            if response_category.status_code == 404:
-                raise not_found
-
-            if response_category.status_code != 200:
-                raise not_authorized
+        category_data = await cls.get_category_data(token, category_id)
+        category_hidden = category_data.get("hidden", False)
 
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
-
-            # Check if the user can add a topic
-            if not PermissionService.can_add_topic(permission_type, category_hidden):
-                raise not_authorized
+        # Check if the user can add a topic
+        if not PermissionService.can_add_topic(permission_type, category_hidden):
+            raise not_authorized
 
         form_data = await request.form()
         name = form_data.get("name")
@@ -142,27 +245,11 @@ class CategoryService:
 
         if not name or not content:
             # Return to the form with an error message if required fields are missing
-            # Get the category details to maintain consistency with get_topic_form
-            async with httpx.AsyncClient() as client:
-                headers = {"Cache-Control": "no-cache", "Authorization": token}
-                response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}",
-                                                    headers=headers)
-
-                if response_category.status_code == 404:
-                    raise not_found
-
-                if response_category.status_code != 200:
-                    raise not_authorized
-
-                category_data = response_category.json()
-                category_hidden = category_data.get("hidden", False)
-
-                # Check if the user can view this category
-                if not PermissionService.can_view_category(permission_type, category_hidden):
-                    raise not_authorized
-
-                data["category"] = category_data
+            # Check if the user can view this category
+            if not PermissionService.can_view_category(permission_type, category_hidden):
+                raise not_authorized
 
+            data["category"] = category_data
             data["message"] = "Topic title and content are required."
             data["request"] = request
             data["title"] = "Add Topic - Forum API Frontend"
@@ -177,83 +264,52 @@ class CategoryService:
             # Double-check permissions before posting
             permission_type = await PermissionService.check_category_permission(request, category_id)
 
-            async with httpx.AsyncClient() as check_client:
-                # Get category details to check if it's hidden
-                response_category = await check_client.get(f"http://172.245.56.116:8000/categories/{category_id}",
-                                                           headers={"Cache-Control": "no-cache", "Authorization": token})
+            # Get category details to check if it's hidden
+            category_data = await cls.get_category_data(token, category_id)
+            category_hidden = category_data.get("hidden", False)
+
+            if not PermissionService.can_add_topic(permission_type, category_hidden):
+                raise not_authorized
 
-                if response_category.status_code == 404:
-                    raise not_found
+            # Convert newlines to <br /> tags
+            content_with_br = content.replace('\n', '<br />')
 
-                if response_category.status_code != 200:
-                    raise not_authorized
+            response = await ApiClient.create_topic(token, name, content_with_br, category_id)
 
-                category_data = response_category.json()
-                category_hidden = category_data.get("hidden", False)
+            if response.status_code == 200 or response.status_code == 201:
+                cls.topic_count_cache.invalidate(category_id)
+                # The cached category (and category list) carry topics_count too
+                cls.invalidate_category(category_id)
 
-                if not PermissionService.can_add_topic(permission_type, category_hidden):
-                    raise not_authorized
+                # Parse the API response to get the topic_id
+                response_data = response.json()
+                topic_id = response_data.get("topic_id")
 
-            async with httpx.AsyncClient() as client:
-                # Convert newlines to <br /> tags
-                content_with_br = content.replace('\n', '<br />')
-
-                topic_data = {
-                    "name": name,
-                    "content": content_with_br,
-                    "category_id": category_id
-                }
-
-                response = await client.post(
-                    f"http://172.245.56.116:8000/topics/",
-                    json=topic_data,
-                    headers={"Content-Type": "application/json", "Authorization": token}
-                )
-
-                if response.status_code == 200 or response.status_code == 201:
-                    # Parse the API response to get the topic_id
-                    response_data = response.json()
-                    topic_id = response_data.get("topic_id")
-
-                    # Redirect to the topic page with success message
-                    return RedirectResponse(url=f"/topics/{topic_id}?success=true", status_code=303)
-
-                # Handle error response
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get("message", error_data.get("detail", f"Error creating topic: {response.status_code}"))
-                except ValueError:
-                    error_message = f"Error creating topic: {response.status_code}"
-
-                # Return to the form with the error message
-                # Get the category details to maintain consistency with get_topic_form
-                response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}",
-                                                     headers={"Cache-Control": "no-cache", "Authorization": token}
-                                                     )
-
-                if response_category.status_code == 404:
-                    raise not_found
-
-                if response_category.status_code != 200:
-                    raise not_authorized
+                # Redirect to the topic page with success message
+                return RedirectResponse(url=f"/topics/{topic_id}?success=true", status_code=303)
 
-                category_data = response_category.json()
-                category_hidden = category_data.get("hidden", False)
+            # Handle error response
+            try:
+                error_data = response.json()
+                error_message = error_data.get("message", error_data.get("detail", f"Error creating topic: {response.status_code}"))
+            except ValueError:
+                error_message = f"Error creating topic: {response.status_code}"
 
-                # Check if the user can view this category
-                if not PermissionService.can_view_category(permission_type, category_hidden):
-                    raise not_authorized
+            # Return to the form with the error message
+            # Check if the user can view this category
+            if not PermissionService.can_view_category(permission_type, category_hidden):
+                raise not_authorized
 
-                data["category"] = category_data
-                data["permission_type"] = permission_type
-                data["message"] = error_message
-                data["request"] = request
-                data["title"] = "Add Topic - Forum API Frontend"
-                return templates.TemplateResponse(
-                    "addtopic.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
+            data["category"] = category_data
+            data["permission_type"] = permission_type
+            data["message"] = error_message
+            data["request"] = request
+            data["title"] = "Add Topic - Forum API Frontend"
+            return templates.TemplateResponse(
+                "addtopic.html",
+                data,
+                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+            )
 
         except httpx.RequestError as e:
             # Handle connection errors
@@ -262,27 +318,16 @@ class CategoryService:
                 # Double-check permissions
                 permission_type = await PermissionService.check_category_permission(request, category_id)
 
-                async with httpx.AsyncClient() as client:
-                    headers = {"Cache-Control": "no-cache", "Authorization": token}
-                    response_category = await client.get(f"http://172.245.56.116:8000/categories/{category_id}",
-                                                         headers=headers)
-
-                    if response_category.status_code == 404:
-                        raise not_found
-
-                    if response_category.status_code != 200:
-                        raise not_authorized
-
-                    category_data = response_category.json()
-                    category_hidden = category_data.get("hidden", False)
+                category_data = await cls.get_category_data(token, category_id)
+                category_hidden = category_data.get("hidden", False)
 
-                    # Check if the user can view this category
-                    if not PermissionService.can_view_category(permission_type, category_hidden):
-                        raise not_authorized
+                # Check if the user can view this category
+                if not PermissionService.can_view_category(permission_type, category_hidden):
+                    raise not_authorized
 
-                    data["category"] = category_data
-                    data["permission_type"] = permission_type
-            except (httpx.RequestError, not_authorized, not_found):
+                data["category"] = category_data
+                data["permission_type"] = permission_type
+            except (httpx.RequestError, ForumError):
                 # If we can't get the category or don't have permission, we'll just continue without it
                 pass
 
@@ -0,0 +1,223 @@
+import zlib
+from typing import Iterable
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """
+    Parse an Accept-Encoding header into content coding -> quality.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, brotli_enabled: bool = True) -> str | None:
+    """
+    Pick the best content coding the client accepts: br, then gzip.
+
+    Returns None when the response should be sent uncompressed.
+    """
+    accepted = accepted_encodings(accept_encoding)
+
+    if brotli is not None and brotli_enabled and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", accepted.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 writes a gzip header and trailer instead of a raw zlib stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _compressor(encoding: str, gzip_level: int, brotli_level: int):
+    if encoding == "br":
+        return _BrotliCompressor(brotli_level)
+    return _GzipCompressor(gzip_level)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int, brotli_level: int) -> bytes:
+    compressor = _compressor(encoding, gzip_level, brotli_level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, depending on the client's Accept-Encoding.
+
+    Only responses whose media type is in content_types are compressed.
+    Complete bodies smaller than minimum_size are sent as they are. Streamed
+    responses are compressed chunk by chunk and flushed after every chunk, so
+    the client can start rendering without waiting for the rest.
+    Responses that already have a Content-Encoding and partial (range)
+    responses are left alone. A strong ETag is made weak on compressed
+    responses, since it was computed over the uncompressed body.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_level: int = 4, brotli_enabled: bool = True,
+                 content_types: Iterable[str] = ("text/html",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.brotli_enabled = brotli_enabled
+        self.content_types = frozenset(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.brotli_enabled)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if (start_message["status"] in (204, 206, 304) or "content-range" in headers
+                        or not self._compressible(headers)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _compressor(encoding, self.gzip_level, self.brotli_level)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+
+                if not more_body:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                await send(start_message)
+
+            if more_body:
+                body = compressor.compress(body) + compressor.flush()
+            else:
+                body = compressor.compress(body) + compressor.finish()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        return media_type in self.content_types
+
+
+class PrecompressedPages:
+    """
+    Static pages rendered once and kept in every supported encoding.
+
+    Meant for the 403/404/500 pages: they do not depend on the request, so
+    there is no reason to render and compress them again for every error.
+    """
+
+    def __init__(self, templates: Jinja2Templates, gzip_level: int = 9, brotli_level: int = 11,
+                 brotli_enabled: bool = True, enabled: bool = True):
+        self.templates = templates
+        self.enabled = enabled
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.brotli_enabled = brotli_enabled
+        self._variants: dict[str, dict[str | None, bytes]] = {}
+
+    def _load(self, name: str) -> dict[str | None, bytes]:
+        body = self.templates.get_template(name).render().encode()
+        variants = {None: body}
+        if not self.enabled:
+            self._variants[name] = variants
+            return variants
+
+        variants["gzip"] = compress(body, "gzip", self.gzip_level, self.brotli_level)
+        if brotli is not None and self.brotli_enabled:
+            variants["br"] = compress(body, "br", self.gzip_level, self.brotli_level)
+        self._variants[name] = variants
+        return variants
+
+    def response(self, request: Request, name: str, status_code: int) -> Response:
+        variants = self._variants.get(name) or self._load(name)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), self.brotli_enabled)
+
+        if encoding not in variants:
+            encoding = None
+
+        headers = {"Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+        return Response(variants[encoding], status_code=status_code, headers=headers, media_type="text/html")
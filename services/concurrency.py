@@ -0,0 +1,87 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Iterable
+
+
+async def bounded_gather(aws: Iterable[Awaitable], limit: int) -> list:
+    """
+    Await all awaitables concurrently with at most `limit` of them in flight.
+
+    Results are returned in the same order as the awaitables were given.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws))
+
+
+def first_exception(group: BaseExceptionGroup) -> BaseException:
+    """
+    Return the first leaf exception of a (possibly nested) exception group.
+    """
+    exception = group.exceptions[0]
+    while isinstance(exception, BaseExceptionGroup):
+        exception = exception.exceptions[0]
+    return exception
+
+
+@asynccontextmanager
+async def task_group() -> AsyncIterator[asyncio.TaskGroup]:
+    """
+    asyncio.TaskGroup that re-raises the first failure on its own.
+
+    A failing task cancels its siblings as usual, but callers see the original
+    exception (e.g. not_found or not_authorized) instead of an ExceptionGroup,
+    so the existing error handlers keep working.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            yield tg
+    except BaseExceptionGroup as group:
+        raise first_exception(group) from None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key starts the call; everyone who asks for the same
+    key before it finishes awaits that same result (or exception). Nothing is
+    kept once the call is done, so this is not a cache.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.coalesced += 1
+
+        # A waiter that gets cancelled (e.g. by a timeout) must not cancel the
+        # call for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
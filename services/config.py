@@ -0,0 +1,122 @@
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_list(name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+# Backend API
+API_BASE_URL = os.getenv("FORUM_API_BASE_URL", "http://172.245.56.116:8000").rstrip("/")
+API_TIMEOUT = _env_float("FORUM_API_TIMEOUT", 10.0)
+API_RETRIES = _env_int("FORUM_API_RETRIES", 1)  # extra attempts for GET requests on connection errors
+API_SINGLE_FLIGHT = _env_bool("FORUM_API_SINGLE_FLIGHT", True)  # share identical concurrent GETs
+API_CONDITIONAL_GET = _env_bool("FORUM_API_CONDITIONAL_GET", True)  # revalidate large listings with ETags
+API_VALIDATOR_CACHE_TTL = _env_float("FORUM_API_VALIDATOR_CACHE_TTL", 300.0)
+API_VALIDATOR_CACHE_MAXSIZE = _env_int("FORUM_API_VALIDATOR_CACHE_MAXSIZE", 1000)
+
+# Backend HTTP connection pool
+HTTP_MAX_CONNECTIONS = _env_int("FORUM_HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("FORUM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+HTTP_KEEPALIVE_EXPIRY = _env_float("FORUM_HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP_HTTP2 = _env_bool("FORUM_HTTP_HTTP2", False)  # requires the "h2" package
+
+# Authenticated user profiles (/users/me) cached by access token
+USER_CACHE_TTL = _env_float("FORUM_USER_CACHE_TTL", 30.0)
+USER_CACHE_MAXSIZE = _env_int("FORUM_USER_CACHE_MAXSIZE", 1024)
+
+# Per-reply vote lookups on the topic page
+VOTE_LOOKUP_CONCURRENCY = _env_int("FORUM_VOTE_LOOKUP_CONCURRENCY", 10)
+VOTE_LOOKUP_TIMEOUT = _env_float("FORUM_VOTE_LOOKUP_TIMEOUT", 3.0)
+
+# Last-message lookups on the conversations inbox
+LAST_MESSAGE_CONCURRENCY = _env_int("FORUM_LAST_MESSAGE_CONCURRENCY", 10)
+
+# Messages shown when a conversation is opened, and loaded per "older messages" request
+CONVERSATION_PAGE_SIZE = _env_int("FORUM_CONVERSATION_PAGE_SIZE", 30)
+
+# Try bulk backend endpoints (falls back to per-item calls when they are missing)
+API_BULK_ENDPOINTS = _env_bool("FORUM_API_BULK_ENDPOINTS", False)
+
+# Ask the backend for one page of a list (falls back to slicing the full list when it ignores the parameters)
+API_PAGINATION = _env_bool("FORUM_API_PAGINATION", False)
+
+# Live updates of an open conversation (server-sent events fed by polling the backend).
+# Off by default unless the backend is asked for deltas, since every poll would otherwise download the full history.
+CONVERSATION_EVENTS_ENABLED = _env_bool("FORUM_CONVERSATION_EVENTS_ENABLED", API_PAGINATION)
+CONVERSATION_POLL_INTERVAL = _env_float("FORUM_CONVERSATION_POLL_INTERVAL", 3.0)
+CONVERSATION_POLL_MAX_INTERVAL = _env_float("FORUM_CONVERSATION_POLL_MAX_INTERVAL", 30.0)  # backoff cap while idle
+CONVERSATION_EVENTS_TIMEOUT = _env_float("FORUM_CONVERSATION_EVENTS_TIMEOUT", 300.0)  # then the client reconnects
+
+# Category permission checks on the home page
+PERMISSION_CHECK_CONCURRENCY = _env_int("FORUM_PERMISSION_CHECK_CONCURRENCY", 10)
+
+# Category permission types cached by (user id, category id)
+PERMISSION_CACHE_TTL = _env_float("FORUM_PERMISSION_CACHE_TTL", 60.0)
+PERMISSION_CACHE_MAXSIZE = _env_int("FORUM_PERMISSION_CACHE_MAXSIZE", 10000)
+
+# Category metadata shared by all users (stale entries are refreshed in the background)
+CATEGORY_CACHE_TTL = _env_float("FORUM_CATEGORY_CACHE_TTL", 15.0)
+CATEGORY_CACHE_STALE_TTL = _env_float("FORUM_CATEGORY_CACHE_STALE_TTL", 60.0)
+CATEGORY_CACHE_MAXSIZE = _env_int("FORUM_CATEGORY_CACHE_MAXSIZE", 1000)
+
+# Topics shown per page of a category, and how long a category's topic count is reused for its pager
+CATEGORY_PAGE_SIZE = _env_int("FORUM_CATEGORY_PAGE_SIZE", 20)
+TOPIC_COUNT_CACHE_TTL = _env_float("FORUM_TOPIC_COUNT_CACHE_TTL", 60.0)
+
+# Reply lists shared by all viewers of a topic (opt-in; our own writes invalidate them)
+REPLY_CACHE_ENABLED = _env_bool("FORUM_REPLY_CACHE_ENABLED", False)
+REPLY_CACHE_TTL = _env_float("FORUM_REPLY_CACHE_TTL", 2.0)
+REPLY_CACHE_STALE_TTL = _env_float("FORUM_REPLY_CACHE_STALE_TTL", 30.0)
+REPLY_CACHE_MAXSIZE = _env_int("FORUM_REPLY_CACHE_MAXSIZE", 500)
+
+# Replies shown per page of a topic, and how long the position of a topic's best reply is reused for its first page
+REPLY_PAGE_SIZE = _env_int("FORUM_REPLY_PAGE_SIZE", 25)
+BEST_REPLY_CACHE_TTL = _env_float("FORUM_BEST_REPLY_CACHE_TTL", 60.0)
+
+# Response compression (brotli requires the "brotli" package, gzip is always available)
+COMPRESSION_ENABLED = _env_bool("FORUM_COMPRESSION_ENABLED", True)
+COMPRESSION_MIN_SIZE = _env_int("FORUM_COMPRESSION_MIN_SIZE", 1024)
+COMPRESSION_GZIP_LEVEL = _env_int("FORUM_COMPRESSION_GZIP_LEVEL", 6)
+COMPRESSION_BROTLI = _env_bool("FORUM_COMPRESSION_BROTLI", True)
+COMPRESSION_BROTLI_LEVEL = _env_int("FORUM_COMPRESSION_BROTLI_LEVEL", 4)
+COMPRESSION_CONTENT_TYPES = _env_list("FORUM_COMPRESSION_CONTENT_TYPES", (
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+))
+
+# Jinja templates (production mode turns off auto-reload and precompiles into a bytecode cache)
+TEMPLATE_PRODUCTION = _env_bool("FORUM_TEMPLATE_PRODUCTION", False)
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("FORUM_TEMPLATE_BYTECODE_CACHE_DIR")  # defaults to a temp directory
+
+# Rendered template fragments ({% cache %} blocks), keyed by the data they show
+FRAGMENT_CACHE_ENABLED = _env_bool("FORUM_FRAGMENT_CACHE_ENABLED", True)
+FRAGMENT_CACHE_TTL = _env_float("FORUM_FRAGMENT_CACHE_TTL", 300.0)
+FRAGMENT_CACHE_MAXSIZE = _env_int("FORUM_FRAGMENT_CACHE_MAXSIZE", 256)
+
+# Stream the topic page while it renders instead of building it in memory first
+TOPIC_STREAMING = _env_bool("FORUM_TOPIC_STREAMING", False)
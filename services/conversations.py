@@ -1,13 +1,23 @@
+import asyncio
+import json
+
 import httpx
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 
+from services import config
+from services.api_client import ApiClient
 from services.auth import AuthService
+from services.concurrency import bounded_gather
 from services.cookies import Cookies
-from services.errors import not_authorized, not_found
+from services.errors import ForumError, not_authorized, not_found
+from services.http_cache import wants_json
 from services.jinja import templates
 
 
 class ConversationsService:
+    # None until the bulk last-message endpoint has been tried
+    _bulk_last_messages_supported = None
+
     def __init__(self):
         pass
 
@@ -19,55 +29,107 @@ class ConversationsService:
         if not data["is_authenticated"]:
             raise not_authorized
 
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(f"http://172.245.56.116:8000/conversations/",
-                                        headers=headers)
+        response = await ApiClient.list_conversations(token)
+
+        if response.status_code == 404:
+            raise not_found
+
+        if response.status_code != 200:
+            raise not_authorized
+
+        conversations = response.json()
+
+        # Fetch last message for each conversation
+        await cls._add_last_messages(token, conversations)
+
+        data["conversations"] = conversations
+        data["admin"] = True if data.get("admin") > 0 else False
+        data["title"] = "Conversations - Forum API Frontend"
+        data["request"] = request
+
+        return templates.TemplateResponse(
+            "conversations.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
-            if response.status_code == 404:
-                raise not_found
+    @classmethod
+    def _set_last_message(cls, user, last_message):
+        # Add the last message to the user object
+        user['last_message'] = last_message
+        # Truncate the content if it's too long
+        if last_message and 'content' in last_message and last_message['content']:
+            user['last_message_content'] = last_message['content'][:50] + (
+                '...' if len(last_message['content']) > 50 else '')
+        else:
+            user['last_message_content'] = "No messages yet"
+
+    @classmethod
+    async def _add_last_message(cls, token, user):
+        try:
+            last_message_response = await ApiClient.get_last_message(token, user['id'])
+
+            if last_message_response.status_code == 200:
+                cls._set_last_message(user, last_message_response.json())
+            else:
+                cls._set_last_message(user, None)
+        except Exception as e:
+            # Handle any errors that might occur during the API call
+            user['last_message'] = None
+            user['last_message_content'] = "Error fetching message"
 
-            if response.status_code != 200:
-                raise not_authorized
+    @classmethod
+    async def _get_last_messages_bulk(cls, token, user_ids):
+        """
+        Fetch the last message of several conversations with one bulk call.
 
-            conversations = response.json()
+        The endpoint is expected to answer with a JSON object mapping user ids to
+        their last message.
 
-            # Fetch last message for each conversation
+        Returns:
+            dict | None: user_id -> last message, or None if the backend has no bulk endpoint
+        """
+        if not config.API_BULK_ENDPOINTS or cls._bulk_last_messages_supported is False:
+            return None
+
+        try:
+            response = await ApiClient.get_last_messages(token, user_ids)
+        except httpx.RequestError:
+            return None
+
+        if response.status_code in (404, 405):
+            # Remember that the backend doesn't offer the endpoint
+            cls._bulk_last_messages_supported = False
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        cls._bulk_last_messages_supported = True
+        return {int(user_id): message for user_id, message in response.json().items()}
+
+    @classmethod
+    async def _add_last_messages(cls, token, conversations):
+        """
+        Add the last message to every conversation.
+
+        Uses the bulk endpoint when the backend supports it and otherwise fetches
+        the messages concurrently, one request per conversation. A failure for one
+        conversation doesn't affect the others.
+        """
+        if not conversations:
+            return
+
+        last_messages = await cls._get_last_messages_bulk(token, [user['id'] for user in conversations])
+        if last_messages is not None:
             for user in conversations:
-                try:
-                    last_message_response = await client.get(
-                        f"http://172.245.56.116:8000/conversations/last-message/{user['id']}",
-                        headers=headers
-                    )
-
-                    if last_message_response.status_code == 200:
-                        last_message = last_message_response.json()
-                        # Add the last message to the user object
-                        user['last_message'] = last_message
-                        # Truncate the content if it's too long
-                        if 'content' in last_message and last_message['content']:
-                            user['last_message_content'] = last_message['content'][:50] + (
-                                '...' if len(last_message['content']) > 50 else '')
-                        else:
-                            user['last_message_content'] = "No messages yet"
-                    else:
-                        user['last_message'] = None
-                        user['last_message_content'] = "No messages yet"
-                except Exception as e:
-                    # Handle any errors that might occur during the API call
-                    user['last_message'] = None
-                    user['last_message_content'] = "Error fetching message"
-
-            data["conversations"] = conversations
-            data["admin"] = True if data.get("admin") > 0 else False
-            data["title"] = "Conversations - Forum API Frontend"
-            data["request"] = request
-
-            return templates.TemplateResponse(
-                "conversations.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+                cls._set_last_message(user, last_messages.get(user['id']))
+            return
+
+        await bounded_gather(
+            (cls._add_last_message(token, user) for user in conversations),
+            limit=config.LAST_MESSAGE_CONCURRENCY
+        )
 
     @classmethod
     async def get_conversation_messages(cls, request, conversation_user_id, error_message=None):
@@ -77,53 +139,193 @@ class ConversationsService:
         if not data["is_authenticated"]:
             return RedirectResponse(url="/auth/login", status_code=303)
 
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
+        user_response = await ApiClient.get_user(token, conversation_user_id)
 
-            user_response = await client.get(
-                f"http://172.245.56.116:8000/users/{conversation_user_id}",
-                headers=headers
-            )
+        if user_response.status_code == 404:
+            raise not_found
 
-            if user_response.status_code == 404:
-                raise not_found
+        if user_response.status_code != 200:
+            raise not_authorized
 
-            if user_response.status_code != 200:
-                raise not_authorized
+        conversation_user = user_response.json()
+
+        # Fetch the newest messages between users, older ones are loaded on demand
+        try:
+            messages, has_older = await cls._get_messages(token, conversation_user_id)
+        except (ForumError, httpx.HTTPError):
+            # Handle any errors that might occur during the API call
+            messages, has_older = [], False
+
+        data["conversation_user"] = conversation_user
+        data["messages"] = messages
+        data["has_older"] = has_older
+        data["live_updates"] = config.CONVERSATION_EVENTS_ENABLED
+        data["user_id"] = data.get("id")  # Pass the authenticated user's ID to the template
+        data["admin"] = True if data.get("admin") > 0 else False
+        data["title"] = f"Conversation with {conversation_user['username']} - Forum API Frontend"
+        data["request"] = request
 
-            conversation_user = user_response.json()
+        # Add error message if provided
+        if error_message:
+            data["error_message"] = error_message
 
-            # Fetch messages between users
-            try:
-                messages_response = await client.get(
-                    f"http://172.245.56.116:8000/conversations/msg/{conversation_user_id}",
-                    headers=headers
-                )
+        return templates.TemplateResponse(
+            "conversation_messages.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
-                if messages_response.status_code == 200:
-                    messages = messages_response.json()
+    @classmethod
+    async def get_messages_json(cls, request, conversation_user_id, before: int = None, after: int = None,
+                                limit: int = None) -> dict:
+        """
+        Messages of a conversation older than `before` or newer than `after`, for the conversation page.
+
+        Returns:
+            dict: the messages (oldest first), whether there are more in the same direction,
+                and the messages rendered as conversation rows
+        """
+        token = Cookies.get_access_token_from_cookie(request)
+        data = await AuthService.get_user_data_from_cookie(request)
+
+        if not data["is_authenticated"]:
+            raise not_authorized
+
+        limit = min(max(limit or config.CONVERSATION_PAGE_SIZE, 1), config.CONVERSATION_PAGE_SIZE)
+        messages, has_more = await cls._get_messages(token, conversation_user_id, before, after, limit)
+        conversation_user = await cls._get_conversation_user(token, data, conversation_user_id, messages)
+
+        html = cls._render_messages(data, conversation_user, messages)
+        return {"messages": messages, "has_more": has_more, "html": html}
+
+    @classmethod
+    async def stream_messages(cls, request, conversation_user_id, after: int = None):
+        """
+        Server-sent events with the messages of a conversation newer than `after`.
+
+        The backend has no way to push messages, so it is polled every
+        CONVERSATION_POLL_INTERVAL seconds for as long as the client stays connected,
+        at most CONVERSATION_EVENTS_TIMEOUT seconds. The client then reconnects,
+        resuming after the last event id it received.
+        """
+        if not config.CONVERSATION_EVENTS_ENABLED:
+            raise not_found
+
+        token = Cookies.get_access_token_from_cookie(request)
+        data = await AuthService.get_user_data_from_cookie(request)
+
+        if not data["is_authenticated"]:
+            raise not_authorized
+
+        last_event_id = request.headers.get("last-event-id", "")
+        if last_event_id.isdigit():
+            after = int(last_event_id)
+
+        return StreamingResponse(
+            cls._message_events(request, token, data, conversation_user_id, after),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @classmethod
+    async def _message_events(cls, request, token, data, conversation_user_id, after: int = None):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.CONVERSATION_EVENTS_TIMEOUT
+        interval = config.CONVERSATION_POLL_INTERVAL
+        conversation_user = None
+
+        yield f"retry: {int(config.CONVERSATION_POLL_INTERVAL * 1000)}\n\n"
+
+        while loop.time() < deadline and not await request.is_disconnected():
+            try:
+                if after is None:
+                    # Without a starting point, only messages sent from now on are pushed
+                    newest, _ = await cls._get_messages(token, conversation_user_id, limit=1)
+                    after = newest[-1].get("id", 0) if newest else 0
+                    messages, has_more = [], False
                 else:
-                    messages = []
-            except Exception as e:
-                # Handle any errors that might occur during the API call
-                messages = []
+                    messages, has_more = await cls._get_messages(token, conversation_user_id, after=after)
+            except ForumError:
+                # The user lost access to the conversation
+                return
+            except httpx.HTTPError:
+                messages, has_more = [], False
+
+            if messages:
+                if conversation_user is None:
+                    conversation_user = await cls._get_conversation_user(token, data, conversation_user_id, messages)
+                after = messages[-1].get("id", after)
+                payload = json.dumps({"messages": messages, "html": cls._render_messages(data, conversation_user, messages)})
+                yield f"id: {after}\nevent: messages\ndata: {payload}\n\n"
+                interval = config.CONVERSATION_POLL_INTERVAL
+            else:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                # Idle conversations are polled less and less often
+                interval = min(interval * 2, max(config.CONVERSATION_POLL_MAX_INTERVAL, config.CONVERSATION_POLL_INTERVAL))
+
+            if not has_more:
+                await asyncio.sleep(min(interval, max(deadline - loop.time(), 0)))
 
-            data["conversation_user"] = conversation_user
-            data["messages"] = messages
-            data["user_id"] = data.get("id")  # Pass the authenticated user's ID to the template
-            data["admin"] = True if data.get("admin") > 0 else False
-            data["title"] = f"Conversation with {conversation_user['username']} - Forum API Frontend"
-            data["request"] = request
+    @classmethod
+    async def _get_conversation_user(cls, token, data, conversation_user_id, messages) -> dict | None:
+        """
+        The other user's profile, which is only needed (and fetched) to render their messages.
+        """
+        if all(message.get("sender_id") == data.get("id") for message in messages):
+            return None
+
+        user_response = await ApiClient.get_user(token, conversation_user_id)
+        if user_response.status_code != 200:
+            return {"id": conversation_user_id}
+        return user_response.json()
 
-            # Add error message if provided
-            if error_message:
-                data["error_message"] = error_message
+    @classmethod
+    def _render_messages(cls, data, conversation_user, messages) -> str:
+        """
+        Render messages as the conversation page's message rows.
+        """
+        return templates.get_template("conversations/messages.html").render({
+            "messages": messages,
+            "user_id": data.get("id"),
+            "avatar": data.get("avatar"),
+            "username": data.get("username"),
+            "conversation_user": conversation_user or {},
+        })
 
-            return templates.TemplateResponse(
-                "conversation_messages.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+    @classmethod
+    async def _get_messages(cls, token, conversation_user_id, before: int = None, after: int = None,
+                            limit: int = None) -> tuple[list, bool]:
+        """
+        Get a slice of a conversation's messages, oldest first.
+
+        Without `after` these are the newest `limit` messages, older than `before` if it
+        is given; with `after`, the first `limit` messages newer than it. With
+        API_PAGINATION only the slice is requested from the backend. The filtering is
+        repeated here for backends that ignore the parameters and send the full history.
+
+        Returns:
+            tuple: (messages, whether there are more messages beyond the slice)
+        """
+        limit = limit or config.CONVERSATION_PAGE_SIZE
+
+        if config.API_PAGINATION:
+            # One message more than needed tells whether there are more
+            response = await ApiClient.get_messages(token, conversation_user_id,
+                                                    before=before, after=after, limit=limit + 1)
+        else:
+            response = await ApiClient.get_messages(token, conversation_user_id)
+
+        if response.status_code != 200:
+            raise not_authorized
+
+        messages = sorted(response.json(), key=lambda message: message.get("id", 0))
+        if before is not None:
+            messages = [message for message in messages if message.get("id", 0) < before]
+        if after is not None:
+            messages = [message for message in messages if message.get("id", 0) > after]
+            return messages[:limit], len(messages) > limit
+        return messages[-limit:], len(messages) > limit
 
     @classmethod
     async def send_message(cls, request, conversation_user_id):
@@ -139,46 +341,46 @@ class ConversationsService:
 
         if not message_content:
             # Return to the conversation page with an error message
-            return await cls.get_conversation_messages(request, conversation_user_id,
-                                                       error_message="Message cannot be empty")
-
-        # Prepare the request body
-        message_data = {
-            "content": message_content,
-            "receiver_id": conversation_user_id
-        }
+            return await cls._send_error(request, conversation_user_id, "Message cannot be empty")
 
         # Send the message to the API
-        async with httpx.AsyncClient() as client:
-            headers = {"Content-Type": "application/json", "Cache-Control": "no-cache", "Authorization": token}
-            try:
-                response = await client.post(
-                    f"http://172.245.56.116:8000/conversations/messages/",
-                    json=message_data,
-                    headers=headers
-                )
-
-                # Check if the message was sent successfully
-                if response.status_code == 200 or response.status_code == 201:
-                    # Redirect back to the conversation page
-                    return RedirectResponse(url=f"/conversations/{conversation_user_id}", status_code=303)
-                else:
-                    # Try to get error message from response
-                    try:
-                        error_data = response.json()
-                        error_message = error_data.get("message", error_data.get("detail",
-                                                                                 f"Error sending message: {response.status_code}"))
-                    except:
-                        error_message = f"Error sending message: {response.status_code}"
+        try:
+            response = await ApiClient.send_message(token, conversation_user_id, message_content)
+
+            # Check if the message was sent successfully
+            if response.status_code == 200 or response.status_code == 201:
+                # The conversation page fetches the new messages itself
+                if wants_json(request):
+                    return JSONResponse({"sent": True})
+
+                # Redirect back to the conversation page
+                return RedirectResponse(url=f"/conversations/{conversation_user_id}", status_code=303)
+            else:
+                # Try to get error message from response
+                try:
+                    error_data = response.json()
+                    error_message = error_data.get("message", error_data.get("detail",
+                                                                             f"Error sending message: {response.status_code}"))
+                except:
+                    error_message = f"Error sending message: {response.status_code}"
 
-                    # Return to the conversation page with the error message
-                    return await cls.get_conversation_messages(request, conversation_user_id,
-                                                               error_message=error_message)
+                # Return to the conversation page with the error message
+                return await cls._send_error(request, conversation_user_id, error_message, response.status_code)
 
-            except httpx.RequestError as e:
-                # Handle connection errors
-                error_message = f"Error connecting to API: {str(e)}"
-                return await cls.get_conversation_messages(request, conversation_user_id, error_message=error_message)
+        except httpx.RequestError as e:
+            # Handle connection errors
+            error_message = f"Error connecting to API: {str(e)}"
+            return await cls._send_error(request, conversation_user_id, error_message, 502)
+
+    @classmethod
+    async def _send_error(cls, request, conversation_user_id, error_message: str, status_code: int = 400):
+        """
+        Report a message that could not be sent, as JSON for the conversation page's
+        script and as the conversation page otherwise.
+        """
+        if wants_json(request):
+            return JSONResponse({"detail": error_message}, status_code=status_code)
+        return await cls.get_conversation_messages(request, conversation_user_id, error_message=error_message)
 
     @classmethod
     async def start_new_message_form(cls, request, message=None):
@@ -203,11 +405,9 @@ class ConversationsService:
         if not data["is_authenticated"]:
             return RedirectResponse(url="/auth/login")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"http://172.245.56.116:8000/users/search/{username}",
-                                        headers={"Cache-Control": "no-cache", "Authorization": token})
-            if response.status_code == 200:
-                user_data = response.json()
-                return RedirectResponse(url=f"/conversations/{user_data.get("id")}", status_code=303)
-            message = f"Oops! {response.json().get('detail', 'Unknown error')}"
-            return await cls.start_new_message_form(request, message=message)
+        response = await ApiClient.search_user(token, username)
+        if response.status_code == 200:
+            user_data = response.json()
+            return RedirectResponse(url=f"/conversations/{user_data.get("id")}", status_code=303)
+        message = f"Oops! {response.json().get('detail', 'Unknown error')}"
+        return await cls.start_new_message_form(request, message=message)
@@ -37,8 +37,13 @@ class Cookies:
             return None
 
     @classmethod
-    def delete_token_cookie(cls):
+    def delete_token_cookie(cls, request: Request = None):
         """Delete the access_token cookie from the response."""
+        if request is not None:
+            # Imported here because services.auth depends on this module
+            from services.auth import AuthService
+            AuthService.invalidate_user_cache(cls.get_access_token_from_cookie(request))
+
         response = RedirectResponse(url="/", status_code=303)
         response.delete_cookie(key="access_token")
         return response
\ No newline at end of file
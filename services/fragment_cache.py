@@ -0,0 +1,68 @@
+import hashlib
+import json
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from services import config
+from services.cache import TTLCache
+
+# Rendered template fragments by their cache key
+fragment_cache = TTLCache(
+    maxsize=config.FRAGMENT_CACHE_MAXSIZE,
+    ttl=config.FRAGMENT_CACHE_TTL
+)
+
+
+def data_version(*values) -> str:
+    """
+    Short fingerprint of the data a fragment is rendered from, for use in its cache key.
+
+    Equal data gives the same version, so a fragment keyed by it is re-rendered
+    exactly when the data changes.
+    """
+    encoded = json.dumps(values, sort_keys=True, default=str, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds a {% cache %} tag that renders its body once per key:
+
+        {% cache "replies", topic.id, replies_version, is_topic_creator %}
+            ...
+        {% endcache %}
+
+    The key is the list of expressions after the tag; it must name every
+    value the body depends on, and each of them must be hashable. Fragments are
+    stored in environment.fragment_cache (nothing is cached when it is None).
+    """
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", [nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key: list, caller) -> str:
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+
+        key = tuple(key)
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
@@ -0,0 +1,60 @@
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def page_etag(body: bytes) -> str:
+    """
+    Strong ETag for a rendered page body.
+    """
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the request's If-None-Match header matches the given ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison is what If-None-Match calls for; it also matches the W/ form
+    # CompressionMiddleware sends for compressed pages
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def wants_json(request: Request) -> bool:
+    """
+    Check whether the request was made by a script asking for JSON instead of a page.
+    """
+    return request.headers.get("accept", "").startswith("application/json")
+
+
+def revalidated_page(request: Request, response: Response) -> Response:
+    """
+    Let the browser revalidate a rendered page instead of downloading it again.
+
+    The page is still rendered on every request, but it gets an ETag over its
+    body and a 304 Not Modified without a body is sent when the browser
+    already has it. Pages show user-specific data, so they may only be stored
+    by the browser (private) and must be revalidated each time (no-cache).
+
+    Only successful responses are affected.
+    """
+    if response.status_code != 200:
+        return response
+
+    headers = {
+        "ETag": page_etag(response.body),
+        "Cache-Control": "private, no-cache",
+        "Vary": "Cookie",
+    }
+
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
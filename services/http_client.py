@@ -0,0 +1,52 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from services import config
+
+
+class HttpClient:
+    """
+    Application-lifetime httpx.AsyncClient shared by all services.
+
+    The client is created by the FastAPI lifespan hook in main.py so that
+    connections to the backend API are pooled and kept alive between requests.
+    """
+    _client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def create_client(cls) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(limits=limits, http2=config.HTTP_HTTP2)
+
+    @classmethod
+    async def start(cls):
+        if cls._client is None:
+            cls._client = cls.create_client()
+
+    @classmethod
+    async def stop(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @classmethod
+    @asynccontextmanager
+    async def session(cls) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Yield the shared client without closing it afterwards.
+
+        Falls back to a short-lived client when the application lifespan has
+        not started one (e.g. when a service is used from a script).
+        """
+        if cls._client is not None:
+            yield cls._client
+            return
+
+        async with cls.create_client() as client:
+            yield client
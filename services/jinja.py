@@ -1,5 +1,78 @@
+import logging
+import time
 from pathlib import Path
+from typing import AsyncIterator
+
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from services import config
+from services.fragment_cache import FragmentCacheExtension, fragment_cache
+from services.static_assets import assets
+
+logger = logging.getLogger("uvicorn.error")
 
 templates_dir = Path(__file__).parent.parent / "templates"
-templates = Jinja2Templates(directory=templates_dir)
\ No newline at end of file
+
+
+def create_environment() -> Environment:
+    """
+    Jinja environment for the templates directory.
+
+    In production mode templates are never checked for changes on disk, and
+    compiled templates are kept in a bytecode cache that survives restarts.
+    """
+    options = {}
+    if config.TEMPLATE_PRODUCTION:
+        options["auto_reload"] = False
+        if config.TEMPLATE_BYTECODE_CACHE_DIR:
+            Path(config.TEMPLATE_BYTECODE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        options["bytecode_cache"] = FileSystemBytecodeCache(config.TEMPLATE_BYTECODE_CACHE_DIR)
+    environment = Environment(
+        loader=FileSystemLoader(templates_dir),
+        autoescape=True,
+        extensions=[FragmentCacheExtension],
+        **options
+    )
+    if config.FRAGMENT_CACHE_ENABLED:
+        environment.fragment_cache = fragment_cache
+    return environment
+
+
+def precompile_templates():
+    """
+    Compile every template up front, so the first requests after a deploy don't pay for it.
+    """
+    start = time.perf_counter()
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info("Compiled %d templates in %.1f ms", len(names), elapsed)
+
+
+async def stream_template(name: str, context: dict, chunk_size: int = 4096) -> AsyncIterator[str]:
+    """
+    Render a template piece by piece for a StreamingResponse.
+
+    Output is sent in chunks of about chunk_size characters, so the start of
+    the page goes out before the rest has been rendered. Rendering stays on
+    the event loop, like TemplateResponse, because the template and fragment
+    caches are not thread-safe.
+    """
+    chunk = []
+    size = 0
+    for piece in templates.get_template(name).generate(context):
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+templates = Jinja2Templates(env=create_environment())
+templates.env.globals["asset_url"] = assets.url
+templates.env.globals["has_asset"] = assets.exists
@@ -1,8 +1,9 @@
-import httpx
 
 from services.auth import AuthService
+from services.categories import CategoryService
 from services.cookies import Cookies
-from services.errors import internal_error
+from services.errors import ForumError, internal_error
+from services.fragment_cache import data_version
 from services.jinja import templates
 from services.permissions import PermissionService
 
@@ -14,41 +15,40 @@ class MainService:
     @classmethod
     async def index_page_logged_in(cls, request, user_data):
         token = Cookies.get_access_token_from_cookie(request)
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(f"http://172.245.56.116:8000/categories/", headers=headers)
-            data = user_data
-            data["admin"] = True if user_data["admin"] > 0 else False
-            if response.status_code == 200:
-                all_categories = response.json()
+        data = user_data
+        data["admin"] = True if user_data["admin"] > 0 else False
+        try:
+            all_categories = await CategoryService.get_all_categories(token)
+        except ForumError:
+            raise internal_error
 
-                # Filter categories based on permissions
-                visible_categories = []
-                for category in all_categories:
-                    # Check permission for this category
-                    if data["admin"]:
-                        permission_type = "write_access"
-                    else:
-                        permission_type = await PermissionService.check_category_permission(request, category["id"])
-                    category_hidden = category.get("hidden", False)
+        # Check permissions for all categories at once
+        permissions = await PermissionService.check_category_permissions(
+            request, [category["id"] for category in all_categories])
 
-                    # Check if user can view this category
-                    if PermissionService.can_view_category(permission_type, category_hidden):
-                        # Add permission info to the category
-                        category["permission_type"] = permission_type
-                        category["can_add_topic"] = PermissionService.can_add_topic(permission_type, category_hidden)
-                        visible_categories.append(category)
+        # Filter categories based on permissions
+        visible_categories = []
+        for category in all_categories:
+            permission_type = permissions[category["id"]]
+            category_hidden = category.get("hidden", False)
 
-                data["categories"] = visible_categories
-                data["title"] = "Home/Categories - Forum API Frontend"
-                data["request"] = request
-                return templates.TemplateResponse(
-                    "categories.html",
-                    data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-            else:
-                raise internal_error
+            # Check if user can view this category
+            if PermissionService.can_view_category(permission_type, category_hidden):
+                # Add permission info to a copy, the cached category is shared
+                visible_categories.append(category | {
+                    "permission_type": permission_type,
+                    "can_add_topic": PermissionService.can_add_topic(permission_type, category_hidden)
+                })
+
+        data["categories"] = visible_categories
+        data["categories_version"] = data_version(visible_categories)
+        data["title"] = "Home/Categories - Forum API Frontend"
+        data["request"] = request
+        return templates.TemplateResponse(
+            "categories.html",
+            data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def get_main_page(cls, request):
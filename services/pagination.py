@@ -0,0 +1,62 @@
+import math
+from typing import Sequence
+
+from services import config
+
+
+class Paginator:
+    """
+    Splits a backend list into pages of page_size items.
+
+    With API_PAGINATION on, callers ask the backend for one page (offset/limit) while
+    it honours those parameters. A backend that ignores them sends the full list
+    instead, which is detected once and from then on the full list is sliced here.
+    """
+
+    def __init__(self, page_size: int):
+        self.page_size = page_size
+        self.backend_paging = True
+
+    def page_count(self, count: int) -> int:
+        return max(1, math.ceil(count / self.page_size))
+
+    def clamp(self, page: int, count: int) -> tuple[int, int]:
+        """
+        Clamp a page number to the pages that exist for count items.
+
+        Returns:
+            tuple: (page, number of pages)
+        """
+        pages = self.page_count(count)
+        return min(max(page, 1), pages), pages
+
+    def offset(self, page: int) -> int:
+        return (page - 1) * self.page_size
+
+    def use_backend(self, count: int | None) -> bool:
+        """
+        Whether to ask the backend for a single page; this needs the number of items
+        up front to clamp the page number.
+        """
+        return config.API_PAGINATION and self.backend_paging and count is not None
+
+    def check_page(self, items: Sequence) -> bool:
+        """
+        Check a page returned by the backend. More than page_size items means it
+        ignored offset/limit, so backend paging is turned off.
+        """
+        if len(items) <= self.page_size:
+            return True
+        self.backend_paging = False
+        return False
+
+    def slice(self, items: Sequence, page: int) -> tuple[Sequence, int, int]:
+        """
+        Cut one page out of the full list, clamping the page number.
+
+        Returns:
+            tuple: (items on the page, page, number of pages)
+        """
+        page, pages = self.clamp(page, len(items))
+        start = self.offset(page)
+        return items[start:start + self.page_size], page, pages
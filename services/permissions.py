@@ -1,6 +1,11 @@
+
 import httpx
 
+from services import config
+from services.api_client import ApiClient
 from services.auth import AuthService
+from services.cache import TTLCache
+from services.concurrency import bounded_gather
 from services.cookies import Cookies
 
 
@@ -11,6 +16,22 @@ class PermissionService:
     READ_ONLY_ACCESS = "read_only_access"
     WRITE_ACCESS = "write_access"
 
+    # None until the bulk permission endpoint has been tried
+    _bulk_permissions_supported = None
+
+    # Permission types keyed by (user id, category id)
+    permission_cache = TTLCache(maxsize=config.PERMISSION_CACHE_MAXSIZE, ttl=config.PERMISSION_CACHE_TTL)
+
+    @classmethod
+    def invalidate_permissions(cls, category_id, user_id=None):
+        """
+        Forget cached permissions for a category, either for one user or for everyone.
+        """
+        if user_id is not None:
+            cls.permission_cache.invalidate((user_id, category_id))
+        else:
+            cls.permission_cache.invalidate_where(lambda key: key[1] == category_id)
+
     @classmethod
     async def check_category_permission(cls, request, category_id):
         """
@@ -29,22 +50,112 @@ class PermissionService:
 
         user_data = await AuthService.get_user_data_from_cookie(request)
         if not user_data["admin"] > 0:
-            async with httpx.AsyncClient() as client:
-                headers = {"Cache-Control": "no-cache", "Authorization": token}
-                response = await client.get(
-                    f"http://172.245.56.116:8000/categories/{category_id}/check-permission",
-                    headers=headers
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("access_type", cls.NO_ACCESS)
-
-                # If there's an error with the API call, default to no access
-                return cls.NO_ACCESS
+            permission_type = cls.permission_cache.get((user_data.get("id"), category_id))
+            if permission_type is not None:
+                return permission_type
+
+            return await cls._fetch_category_permission(token, user_data.get("id"), category_id)
         else:
             return "write_access"
 
+    @classmethod
+    async def check_category_permissions(cls, request, category_ids):
+        """
+        Check the user's permission for several categories at once.
+
+        The user is resolved once and the categories that aren't cached yet are
+        checked with a single bulk call when the backend supports it, otherwise
+        concurrently.
+
+        Args:
+            request: The FastAPI request object
+            category_ids: The IDs of the categories to check permissions for
+
+        Returns:
+            dict: category_id -> permission type
+        """
+        category_ids = list(category_ids)
+        token = Cookies.get_access_token_from_cookie(request)
+        if not token:
+            return dict.fromkeys(category_ids, cls.NO_ACCESS)
+
+        user_data = await AuthService.get_user_data_from_cookie(request)
+        if user_data["admin"] > 0:
+            return dict.fromkeys(category_ids, cls.WRITE_ACCESS)
+
+        user_id = user_data.get("id")
+        permissions = {}
+        missing_ids = []
+        for category_id in category_ids:
+            permission_type = cls.permission_cache.get((user_id, category_id))
+            if permission_type is None:
+                missing_ids.append(category_id)
+            else:
+                permissions[category_id] = permission_type
+
+        if not missing_ids:
+            return permissions
+
+        fetched = await cls._fetch_category_permissions_bulk(token, user_id, missing_ids)
+        if fetched is None:
+            permission_types = await bounded_gather(
+                (cls._fetch_category_permission(token, user_id, category_id)
+                 for category_id in missing_ids),
+                limit=config.PERMISSION_CHECK_CONCURRENCY
+            )
+            fetched = dict(zip(missing_ids, permission_types))
+
+        return permissions | fetched
+
+    @classmethod
+    async def _fetch_category_permission(cls, token, user_id, category_id):
+        response = await ApiClient.check_permission(token, category_id)
+
+        if response.status_code == 200:
+            data = response.json()
+            permission_type = data.get("access_type", cls.NO_ACCESS)
+            cls.permission_cache.set((user_id, category_id), permission_type)
+            return permission_type
+
+        # If there's an error with the API call, default to no access
+        return cls.NO_ACCESS
+
+    @classmethod
+    async def _fetch_category_permissions_bulk(cls, token, user_id, category_ids):
+        """
+        Check several categories with one call to the backend's bulk endpoint.
+
+        The endpoint is expected to answer with a JSON object mapping category ids
+        to access types.
+
+        Returns:
+            dict | None: category_id -> permission type, or None if the backend has no bulk endpoint
+        """
+        if not config.API_BULK_ENDPOINTS or cls._bulk_permissions_supported is False:
+            return None
+
+        try:
+            response = await ApiClient.check_permissions(token, category_ids)
+        except httpx.RequestError:
+            return None
+
+        if response.status_code in (404, 405):
+            # Remember that the backend doesn't offer the endpoint
+            cls._bulk_permissions_supported = False
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        cls._bulk_permissions_supported = True
+        access_types = {int(category_id): access_type for category_id, access_type in response.json().items()}
+        permissions = {}
+        for category_id in category_ids:
+            if category_id in access_types:
+                cls.permission_cache.set((user_id, category_id), access_types[category_id])
+            permissions[category_id] = access_types.get(category_id, cls.NO_ACCESS)
+        return permissions
+
     @classmethod
     def can_view_category(cls, permission_type, category_hidden=False):
         """
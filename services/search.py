@@ -1,10 +1,11 @@
 from fastapi import Request
-import httpx
 from starlette.responses import RedirectResponse
 
+from services.api_client import ApiClient
 from services.auth import AuthService
 from services.cookies import Cookies
 from services.errors import not_authorized
+from services.http_cache import revalidated_page
 from services.jinja import templates
 
 
@@ -24,38 +25,29 @@ class SearchService:
         # Connect to the API to get search results
         # Subtract 1 from page number because API uses 0-based indexing
         api_page = page - 1
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(
-                f"http://172.245.56.116:8000/topics/?search={search}&page={api_page}&sort={sort}",
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                raise not_authorized
-
-            # Parse the response
-            response_data = response.json()
-            topics = response_data.get("topics", [])
-            # API returns the total number of pages
-            pages = response_data.get("pages")
-            if pages == 0:
-                pages = 1
-            else:
-                pages += 1
-            # Prepare data for the template
-            data = user_data | {
-                "request": request,
-                "title": "Search Results - Forum API Frontend",
-                "topics": topics,
-                "search": search,
-                "sort": sort,
-                "current_page": page,
-                "pages": pages
-            }
-
-            return templates.TemplateResponse(
-                "search.html",
-                data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        response = await ApiClient.search_topics(token, search, api_page, sort)
+
+        if response.status_code != 200:
+            raise not_authorized
+
+        # Parse the response
+        response_data = response.json()
+        topics = response_data.get("topics", [])
+        # API returns the total number of pages
+        pages = response_data.get("pages")
+        if pages == 0:
+            pages = 1
+        else:
+            pages += 1
+        # Prepare data for the template
+        data = user_data | {
+            "request": request,
+            "title": "Search Results - Forum API Frontend",
+            "topics": topics,
+            "search": search,
+            "sort": sort,
+            "current_page": page,
+            "pages": pages
+        }
+
+        return revalidated_page(request, templates.TemplateResponse("search.html", data))
@@ -0,0 +1,114 @@
+import hashlib
+import mimetypes
+from pathlib import Path, PurePosixPath
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from services.compression import accepted_encodings
+
+static_dir = Path(__file__).parent.parent / "static"
+
+# Precompressed siblings written by build_assets.py, in order of preference
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+class StaticAssets:
+    """
+    Content-hashed names for the files under /static.
+
+    The manifest is built once when the application starts: css/base.css is
+    published as css/base.<hash>.css, so a changed file gets a new URL and the
+    old one can be cached forever.
+    """
+    url_prefix = "/static"
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.manifest: dict[str, str] = {}
+        self._logical: dict[str, str] = {}
+        self.build()
+
+    def build(self):
+        self.manifest.clear()
+        self._logical.clear()
+        for file in sorted(self.directory.rglob("*")):
+            if not file.is_file() or file.suffix in PRECOMPRESSED_SUFFIXES.values():
+                continue
+            path = PurePosixPath(file.relative_to(self.directory).as_posix())
+            digest = hashlib.sha256(file.read_bytes()).hexdigest()[:12]
+            fingerprinted = str(path.with_name(f"{path.stem}.{digest}{path.suffix}"))
+            self.manifest[str(path)] = fingerprinted
+            self._logical[fingerprinted] = str(path)
+
+    def exists(self, path: str) -> bool:
+        return path in self.manifest
+
+    def url(self, path: str) -> str:
+        """
+        Public URL of a static file, fingerprinted when the file exists.
+        """
+        return f"{self.url_prefix}/{self.manifest.get(path, path)}"
+
+    def logical_path(self, fingerprinted: str) -> str | None:
+        return self._logical.get(fingerprinted)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """
+    StaticFiles that also serves fingerprinted names from the assets manifest.
+
+    Fingerprinted URLs never change content, so they are cached for a year
+    without revalidation. Plain names are still served, but must be revalidated.
+
+    When a file has an up-to-date .br or .gz sibling and the client accepts
+    that encoding, the sibling is sent as is instead of compressing on the fly.
+    """
+    immutable_cache_control = "public, max-age=31536000, immutable"
+
+    def __init__(self, *, assets: StaticAssets, **kwargs):
+        super().__init__(directory=assets.directory, **kwargs)
+        self.assets = assets
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        logical = self.assets.logical_path(PurePosixPath(path).as_posix())
+        response = (await self._precompressed_response(logical or path, scope)
+                    or await super().get_response(logical or path, scope))
+
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = self.immutable_cache_control if logical else "public, no-cache"
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Response | None:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        encodings = [encoding for encoding in PRECOMPRESSED_SUFFIXES if accepted.get(encoding, 0) > 0]
+        if not encodings:
+            return None
+
+        _, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if stat_result is None:
+            return None
+
+        for encoding in encodings:
+            full_path, sibling_stat = await anyio.to_thread.run_sync(
+                self.lookup_path, path + PRECOMPRESSED_SUFFIXES[encoding])
+            # A sibling older than the file itself was built from a previous version
+            if sibling_stat is None or sibling_stat.st_mtime < stat_result.st_mtime:
+                continue
+
+            response = self.file_response(full_path, sibling_stat, scope)
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if media_type.startswith("text/"):
+                media_type += "; charset=utf-8"
+            response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        return None
+
+
+assets = StaticAssets(static_dir)
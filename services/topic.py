@@ -1,103 +1,320 @@
+import asyncio
+
 import httpx
 from fastapi import Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 
+from services import config
+from services.api_client import ApiClient
 from services.auth import AuthService
-from services.errors import not_authorized, internal_error, not_found
-from services.jinja import templates
+from services.cache import TTLCache
+from services.categories import CategoryService
+from services.concurrency import bounded_gather, task_group
+from services.errors import ForumError, not_authorized, internal_error, not_found
+from services.fragment_cache import data_version
+from services.http_cache import revalidated_page, wants_json
+from services.jinja import stream_template, templates
+from services.pagination import Paginator
 from services.cookies import Cookies
 from services.permissions import PermissionService
 
 class TopicService:
+    # Reply lists by (topic id, page), with page None for the full list. They are
+    # shared by all viewers, so callers must not modify them.
+    reply_cache = TTLCache(
+        maxsize=config.REPLY_CACHE_MAXSIZE,
+        ttl=config.REPLY_CACHE_TTL,
+        stale_ttl=config.REPLY_CACHE_STALE_TTL
+    )
+
+    # Pages of a topic's reply list
+    reply_pages = Paginator(config.REPLY_PAGE_SIZE)
+
+    # Best replies found past the first page: topic id -> (reply id, 0-based position)
+    best_reply_cache = TTLCache(maxsize=config.REPLY_CACHE_MAXSIZE, ttl=config.BEST_REPLY_CACHE_TTL)
+
+    @classmethod
+    def invalidate_replies(cls, topic_id: int):
+        """
+        Forget the cached reply lists of a topic after it was changed through us.
+        """
+        cls.reply_cache.invalidate_where(lambda key: key[0] == topic_id)
+
+    @classmethod
+    async def _reply_url(cls, token, topic_id: int, reply_id: int, page: int = None,
+                         position: int = None) -> str:
+        """
+        URL of a reply on the page of the topic it is shown on.
+
+        Args:
+            page: The page the reply is on, if the caller knows it
+            position: The reply's 0-based position among the topic's replies, if known
+
+        When neither is given, the reply is looked up in the full reply list. The
+        best reply is pinned to the first page.
+        """
+        if page is None:
+            if position is None:
+                replies = await cls._get_replies(token, topic_id)
+                positions = {reply.get("id"): position for position, reply in enumerate(replies)}
+                position = positions.get(reply_id, 0)
+                if position < len(replies) and replies[position].get("best_reply") == 1:
+                    cls.best_reply_cache.set(topic_id, (reply_id, position))
+                    position = 0
+            page = position // cls.reply_pages.page_size + 1
+
+        if page > 1:
+            return f"/topics/{topic_id}?page={page}#reply-{reply_id}"
+        return f"/topics/{topic_id}#reply-{reply_id}"
+
     @classmethod
-    async def get_topic(cls, request: Request, topic_id: int, success: str = None):
+    async def get_topic(cls, request: Request, topic_id: int, success: str = None, page: int = 1):
 
         # Get authentication status
         token = Cookies.get_access_token_from_cookie(request)
-        headers = {"Cache-Control": "no-cache", "Authorization": token}
-        data = await AuthService.verify_logged_in(request)
+        if token is None:
+            raise not_authorized
+
+        # The user lookup and the topic details don't depend on each other
+        async with task_group() as tg:
+            user_task = tg.create_task(AuthService.verify_logged_in(request))
+            topic_task = tg.create_task(cls._get_topic_data(token, topic_id))
+
+        data = user_task.result()
         data["request"] = request
         data["title"] = "Topic - Forum API Frontend"
 
         if success:
             data["success"] = "Topic created successfully"
 
-        async with httpx.AsyncClient() as client:
-            # Get topic details
-            response_topic = await client.get(
-                f"http://172.245.56.116:8000/topics/{topic_id}",
-                    headers=headers
+        topic_data = topic_task.result()
+        category_id = topic_data.get("category_id")
+
+        # Once the category is known, the permission check, the category details
+        # and the page of replies (with the user's votes) can all be fetched together
+        async with task_group() as tg:
+            permission_task = tg.create_task(PermissionService.check_category_permission(request, category_id))
+            category_task = tg.create_task(CategoryService.get_category_data(token, category_id))
+            replies_task = tg.create_task(cls._get_replies_with_votes(token, topic_id, page, topic_data))
+
+        permission_type = permission_task.result()
+        category_hidden = category_task.result().get("hidden", False)
+
+        # Check if the user can view this category and its topics
+        if not PermissionService.can_view_topics(permission_type, category_hidden):
+            raise not_authorized
+
+        data["topic"] = topic_data
+        replies, best_reply, best_position, data["user_votes"], page, data["pages"] = replies_task.result()
+        data["replies"] = replies
+        data["best_reply"] = best_reply
+        data["best_reply_number"] = best_position + 1 if best_reply else None
+        data["current_page"] = page
+        data["reply_offset"] = cls.reply_pages.offset(page)
+        data["reply_page_size"] = cls.reply_pages.page_size
+        data["permission_type"] = permission_type
+        data["can_reply"] = PermissionService.can_reply_to_topic(permission_type, category_hidden)
+
+        # Versions of the data behind the cached fragments of topic.html
+        data["topic_version"] = data_version(topic_data)
+        data["replies_version"] = data_version(replies, best_reply, best_position)
+        data["user_votes_version"] = data_version(data["user_votes"])
+
+        # Check if the current user is the topic creator
+        # The user_id from the API response is the ID of the current user
+        current_user_id = data.get("id")
+        topic_creator_id = topic_data.get("user_id")
+        data["is_topic_creator"] = current_user_id == topic_creator_id
+
+        if config.TOPIC_STREAMING:
+            # The body is not known up front, so there is no ETag to revalidate against
+            return StreamingResponse(
+                stream_template("topic.html", data),
+                media_type="text/html",
+                headers={"Cache-Control": "private, no-cache"}
             )
 
-            if response_topic.status_code == 404:
-                raise not_found
+        return revalidated_page(request, templates.TemplateResponse("topic.html", data))
 
-            if response_topic.status_code != 200:
-                raise not_authorized
+    @classmethod
+    async def _get_topic_data(cls, token, topic_id: int) -> dict:
+        response_topic = await ApiClient.get_topic(token, topic_id)
 
-            topic_data = response_topic.json()
-            category_id = topic_data.get("category_id")
+        if response_topic.status_code == 404:
+            raise not_found
 
-            # Check the user's permission for this category
-            permission_type = await PermissionService.check_category_permission(request, category_id)
+        if response_topic.status_code != 200:
+            raise not_authorized
 
-            # Get category details to check if it's hidden
-            response_category = await client.get(
-                f"http://172.245.56.116:8000/categories/{category_id}",
-                    headers=headers
-            )
+        return response_topic.json()
+
+    @classmethod
+    async def _get_replies_with_votes(cls, token, topic_id: int, page: int,
+                                      topic_data: dict) -> tuple[list, dict | None, int | None, dict, int, int]:
+        """
+        Get one page of a topic's replies and the best reply pinned above them,
+        followed by the user's vote for each of these replies.
 
-            if response_category.status_code == 404:
-                raise not_found
+        Returns:
+            tuple: (replies, best reply, its 0-based position, reply_id -> vote_type,
+                page, number of pages)
+        """
+        replies, page, pages, all_replies = await cls._get_reply_page(
+            token, topic_id, page, topic_data.get("replies_count"))
 
-            if response_category.status_code != 200:
-                raise not_authorized
+        best_reply, best_position = None, None
+        if page == 1:
+            best_reply, best_position = await cls._get_best_reply(token, topic_id, topic_data, replies, all_replies)
 
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
+        voted = replies + [best_reply] if best_reply is not None and best_reply not in replies else replies
+        return replies, best_reply, best_position, await cls._get_user_votes(token, voted), page, pages
 
-            # Check if the user can view this category and its topics
-            if not PermissionService.can_view_topics(permission_type, category_hidden):
-                raise not_authorized
+    @classmethod
+    async def _get_best_reply(cls, token, topic_id: int, topic_data: dict, first_page: list,
+                              all_replies: list = None) -> tuple[dict | None, int | None]:
+        """
+        Find the best reply of a topic, which the first page shows above the others
+        wherever it is in the thread.
+
+        It is looked up in the first page, then in the full reply list if the caller has
+        it, then at the position remembered in best_reply_cache. Only a topic whose
+        best_reply_id says it has a best reply has its full reply list fetched for it;
+        without best_reply_id, a best reply that can't be found this way isn't pinned.
+
+        Returns:
+            tuple: (best reply, its 0-based position among the replies), or (None, None)
+        """
+        for position, reply in enumerate(first_page):
+            if reply.get("best_reply") == 1:
+                return reply, position
+
+        # The first page holding fewer replies than fit on it is the whole thread
+        if len(first_page) < cls.reply_pages.page_size:
+            return None, None
+
+        if "best_reply_id" in topic_data and topic_data["best_reply_id"] is None:
+            return None, None
+
+        if all_replies is None:
+            best_reply, position = await cls._get_cached_best_reply(token, topic_id)
+            if best_reply is not None or not topic_data.get("best_reply_id"):
+                return best_reply, position
+            all_replies = await cls._get_replies(token, topic_id)
+
+        for position, reply in enumerate(all_replies):
+            if reply.get("best_reply") == 1:
+                cls.best_reply_cache.set(topic_id, (reply.get("id"), position))
+                return reply, position
+        return None, None
+
+    @classmethod
+    async def _get_cached_best_reply(cls, token, topic_id: int) -> tuple[dict | None, int | None]:
+        """
+        Read the best reply from the page it was last found on, if it is still there.
+
+        Returns:
+            tuple: (best reply, its 0-based position among the replies), or (None, None)
+        """
+        reply_id, position = cls.best_reply_cache.get(topic_id, (None, None))
+        if reply_id is None:
+            return None, None
 
-            # Get replies for the topic
-            response_replies = await client.get(
-                f"http://172.245.56.116:8000/topics/{topic_id}/replies", headers=headers)
+        page = position // cls.reply_pages.page_size + 1
+        replies = await cls._get_replies(token, topic_id, page)
+        index = position - cls.reply_pages.offset(page)
+        if index < len(replies) and replies[index].get("id") == reply_id and replies[index].get("best_reply") == 1:
+            return replies[index], position
+
+        # Another reply was marked as best, or the replies before it changed
+        cls.best_reply_cache.invalidate(topic_id)
+        return None, None
+
+    @classmethod
+    async def _get_reply_page(cls, token, topic_id: int, page: int,
+                              reply_count: int = None) -> tuple[list, int, int, list | None]:
+        """
+        Get one page of a topic's replies, clamping the page number to the pages that exist.
+
+        With API_PAGINATION and a known reply count only that page is requested from
+        the backend; otherwise the full list is fetched and sliced here. The best reply
+        stays in its place in the slices; topic.html skips it there and pins it to the
+        first page instead.
+
+        Returns:
+            tuple: (replies, page, number of pages, all replies if they were fetched, else None)
+        """
+        paginator = cls.reply_pages
+
+        if paginator.use_backend(reply_count):
+            page, pages = paginator.clamp(page, reply_count)
+            replies = await cls._get_replies(token, topic_id, page)
+            if paginator.check_page(replies):
+                return replies, page, pages, None
+
+            # The backend sent every reply, slice them here
+            cls.reply_cache.invalidate((topic_id, page))
+        else:
+            replies = await cls._get_replies(token, topic_id)
+
+        page_replies, page, pages = paginator.slice(replies, page)
+        return page_replies, page, pages, replies
+
+    @classmethod
+    async def _get_replies(cls, token, topic_id: int, page: int = None) -> list:
+        """
+        Get the replies of a topic, or one page of them, from the reply cache when it is enabled.
+        """
+        async def load():
+            if page is None:
+                response_replies = await ApiClient.list_replies(token, topic_id)
+            else:
+                response_replies = await ApiClient.list_replies(
+                    token, topic_id,
+                    offset=cls.reply_pages.offset(page),
+                    limit=cls.reply_pages.page_size
+                )
 
             if response_replies.status_code != 200:
                 raise not_authorized
 
-            data["topic"] = topic_data
-            data["replies"] = response_replies.json()
-            data["permission_type"] = permission_type
-            data["can_reply"] = PermissionService.can_reply_to_topic(permission_type, category_hidden)
-
-            # Check if the current user is the topic creator
-            # The user_id from the API response is the ID of the current user
-            current_user_id = data.get("id")
-            topic_creator_id = topic_data.get("user_id")
-            data["is_topic_creator"] = current_user_id == topic_creator_id
+            return response_replies.json()
 
-            # Get the user's current vote for each reply
-            replies = data["replies"]
-            user_votes = {}
+        if not config.REPLY_CACHE_ENABLED:
+            return await load()
 
-            for reply in replies:
-                reply_id = reply.get("id")
-                if reply_id:
-                    response_vote = await client.get(
-                        f"http://172.245.56.116:8000/replies/vote/{reply_id}", headers=headers)
+        return await cls.reply_cache.get_or_load((topic_id, page), load)
 
-                    if response_vote.status_code == 200:
-                        vote_data = response_vote.json()
-                        user_votes[reply_id] = vote_data.get("vote_type", 0)
-                    else:
-                        user_votes[reply_id] = 0
+    @classmethod
+    async def _get_user_vote(cls, token, reply_id: int) -> int:
+        """
+        Get the user's vote for a single reply, falling back to 0 on errors or timeouts.
+        """
+        try:
+            response_vote = await asyncio.wait_for(
+                ApiClient.get_vote(token, reply_id),
+                timeout=config.VOTE_LOOKUP_TIMEOUT
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError):
+            return 0
 
-            data["user_votes"] = user_votes
+        if response_vote.status_code == 200:
+            return response_vote.json().get("vote_type", 0)
+        return 0
 
+    @classmethod
+    async def _get_user_votes(cls, token, replies) -> dict:
+        """
+        Look up the user's votes for the given replies concurrently.
 
-            return templates.TemplateResponse("topic.html", data)
+        Returns:
+            dict: reply_id -> vote_type
+        """
+        reply_ids = [reply.get("id") for reply in replies if reply.get("id")]
+        votes = await bounded_gather(
+            (cls._get_user_vote(token, reply_id) for reply_id in reply_ids),
+            limit=config.VOTE_LOOKUP_CONCURRENCY
+        )
+        return dict(zip(reply_ids, votes))
 
     @classmethod
     async def get_reply_form(cls, request: Request, topic_id: int):
@@ -114,50 +331,40 @@ class TopicService:
         # Get token for API requests
         token = Cookies.get_access_token_from_cookie(request)
 
-        async with httpx.AsyncClient() as client:
-            # Get topic details
-            response_topic = await client.get(
-                f"http://172.245.56.116:8000/topics/{topic_id}",
-                    headers={"Authorization": token})
-
-            if response_topic.status_code == 404:
-                return templates.TemplateResponse("404.html", data, status_code=404)
+        # Get topic details
+        response_topic = await ApiClient.get_topic(token, topic_id)
 
-            if response_topic.status_code != 200:
-                return templates.TemplateResponse("403.html", data, status_code=403)
+        if response_topic.status_code == 404:
+            return templates.TemplateResponse("404.html", data, status_code=404)
 
-            topic_data = response_topic.json()
-            category_id = topic_data.get("category_id")
+        if response_topic.status_code != 200:
+            return templates.TemplateResponse("403.html", data, status_code=403)
 
-            # Check the user's permission for this category
-            permission_type = await PermissionService.check_category_permission(request, category_id)
+        topic_data = response_topic.json()
+        category_id = topic_data.get("category_id")
 
-            # Get category details to check if it's hidden
-            response_category = await client.get(
-                f"http://172.245.56.116:8000/categories/{category_id}",
-                    headers={"Authorization": token}
-            )
-
-            if response_category.status_code == 404:
-                return templates.TemplateResponse("404.html", data, status_code=404)
+        # Check the user's permission for this category
+        permission_type = await PermissionService.check_category_permission(request, category_id)
 
-            if response_category.status_code != 200:
-                return templates.TemplateResponse("403.html", data, status_code=403)
+        # Get category details to check if it's hidden
+        try:
+            category_data = await CategoryService.get_category_data(token, category_id)
+        except ForumError as error:
+            return templates.TemplateResponse(f"{error.status_code}.html", data, status_code=error.status_code)
 
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
+        category_hidden = category_data.get("hidden", False)
 
-            # Check if the user can reply to topics in this category
-            if not PermissionService.can_reply_to_topic(permission_type, category_hidden):
-                return templates.TemplateResponse("403.html", data, status_code=403)
+        # Check if the user can reply to topics in this category
+        if not PermissionService.can_reply_to_topic(permission_type, category_hidden):
+            return templates.TemplateResponse("403.html", data, status_code=403)
 
-            # Check if the user can view this category and its topics
-            if not PermissionService.can_view_topics(permission_type, category_hidden):
-                return templates.TemplateResponse("403.html", data, status_code=403)
+        # Check if the user can view this category and its topics
+        if not PermissionService.can_view_topics(permission_type, category_hidden):
+            return templates.TemplateResponse("403.html", data, status_code=403)
 
-            data["topic"] = topic_data
-            data["permission_type"] = permission_type
-            return templates.TemplateResponse("reply.html", data)
+        data["topic"] = topic_data
+        data["permission_type"] = permission_type
+        return templates.TemplateResponse("reply.html", data)
 
     @classmethod
     async def post_reply(cls, request: Request, topic_id: int):
@@ -170,76 +377,66 @@ class TopicService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Get topic details to check category permissions
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
+        response_topic = await ApiClient.get_topic(token, topic_id)
 
+        if response_topic.status_code == 404:
+            return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
 
-            # Get topic details
-            response_topic = await client.get(
-                f"http://172.245.56.116:8000/topics/{topic_id}", headers=headers)
+        if response_topic.status_code != 200:
+            return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
 
-            if response_topic.status_code == 404:
-                return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+        topic_data = response_topic.json()
+        category_id = topic_data.get("category_id")
 
-            if response_topic.status_code != 200:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
 
-            topic_data = response_topic.json()
-            category_id = topic_data.get("category_id")
+        # Check the user's permission for this category
+        permission_type = await PermissionService.check_category_permission(request, category_id)
 
+        # Get category details to check if it's hidden
+        try:
+            category_data = await CategoryService.get_category_data(token, category_id)
+        except ForumError as error:
+            return templates.TemplateResponse(f"{error.status_code}.html", {"request": request},
+                                              status_code=error.status_code)
 
-            # Check the user's permission for this category
-            permission_type = await PermissionService.check_category_permission(request, category_id)
+        category_hidden = category_data.get("hidden", False)
 
-            # Get category details to check if it's hidden
-            response_category = await client.get(
-                f"http://172.245.56.116:8000/categories/{category_id}", headers=headers)
+        # Check if the user can reply to topics in this category
+        if not PermissionService.can_reply_to_topic(permission_type, category_hidden):
+            return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
 
-            if response_category.status_code == 404:
-                return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+        # Check if the user can view this category and its topics
+        if not PermissionService.can_view_topics(permission_type, category_hidden):
+            return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
 
-            if response_category.status_code != 200:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
+        form_data = await request.form()
+        content = form_data.get("content", "")
 
-            category_data = response_category.json()
-            category_hidden = category_data.get("hidden", False)
+        # Convert newlines to <br /> tags
+        content_with_br = content.replace('\n', '<br />')
 
-            # Check if the user can reply to topics in this category
-            if not PermissionService.can_reply_to_topic(permission_type, category_hidden):
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
+        # Post the reply using the correct API endpoint
+        response = await ApiClient.post_reply(token, topic_id, content_with_br)
 
-            # Check if the user can view this category and its topics
-            if not PermissionService.can_view_topics(permission_type, category_hidden):
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
-
-            form_data = await request.form()
-            content = form_data.get("content", "")
-
-            # Convert newlines to <br /> tags
-            content_with_br = content.replace('\n', '<br />')
-
-            # Post the reply using the correct API endpoint
-            response = await client.post(
-                f"http://172.245.56.116:8000/replies/{topic_id}",
-                json={"content": content_with_br},
-                headers=headers
-            )
+        if response.status_code == 403:
+            data = {"request": request, "message": "The topic is locked.", "topic": topic_data}
+            return templates.TemplateResponse("reply.html", data)
 
-            if response.status_code == 403:
-                data = {"request": request, "message": "The topic is locked.", "topic": topic_data}
-                return templates.TemplateResponse("reply.html", data)
+        # Check if the reply was successfully posted
+        if response.status_code != 200:
+            data = {"request": request, "message": "Failed to post reply", "topic": topic_data}
+            return templates.TemplateResponse("reply.html", data)
 
-            # Check if the reply was successfully posted
-            if response.status_code != 200:
-                data = {"request": request, "message": "Failed to post reply", "topic": topic_data}
-                return templates.TemplateResponse("reply.html", data)
+        cls.invalidate_replies(topic_id)
 
-            # Extract the reply_id from the API response
-            response_data = response.json()
-            reply_id = response_data.get("id")
+        # Extract the reply_id from the API response
+        response_data = response.json()
+        reply_id = response_data.get("id")
 
-            # Redirect back to the topic page with anchor to the new reply
-            return RedirectResponse(url=f"/topics/{topic_id}#reply-{reply_id}", status_code=303)
+        # Redirect back to the page of the topic with the new reply, which comes after
+        # the replies the topic had before
+        url = await cls._reply_url(token, topic_id, reply_id, position=topic_data.get("replies_count"))
+        return RedirectResponse(url=url, status_code=303)
 
     @classmethod
     async def mark_best_reply(cls, request: Request, reply_id: int, topic_id: int):
@@ -252,7 +449,8 @@ class TopicService:
             topic_id: The ID of the topic the reply belongs to
 
         Returns:
-            RedirectResponse: Redirects back to the topic page
+            RedirectResponse: Redirects back to the topic page, or the new best reply
+                as JSON when the request asks for JSON
         """
         # Get authentication status
         data = await AuthService.verify_logged_in(request)
@@ -261,48 +459,58 @@ class TopicService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Get topic details to check if the user is the topic creator
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
+        response_topic = await ApiClient.get_topic(token, topic_id)
 
-            # Get topic details
-            response_topic = await client.get(
-                f"http://172.245.56.116:8000/topics/{topic_id}", headers=headers)
+        if response_topic.status_code == 404:
+            return cls._error_response(request, 404)
 
-            if response_topic.status_code == 404:
-                return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
+        if response_topic.status_code != 200:
+            return cls._error_response(request, 403)
 
-            if response_topic.status_code != 200:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
+        topic_data = response_topic.json()
 
-            topic_data = response_topic.json()
+        # Get user data to check if the user is the topic creator
+        user_data = await AuthService.get_user_data_from_cookie(request)
+        current_user_id = user_data.get("id")
+        topic_creator_id = topic_data.get("user_id")
 
-            # Get user data to check if the user is the topic creator
-            user_data = await AuthService.get_user_data_from_cookie(request)
-            current_user_id = user_data.get("id")
-            topic_creator_id = topic_data.get("user_id")
+        # Check if the user is the topic creator
+        if current_user_id != topic_creator_id:
+            return cls._error_response(request, 403)
 
-            # Check if the user is the topic creator
-            if current_user_id != topic_creator_id:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
+        # Send PUT request to mark the reply as best
+        response = await ApiClient.mark_best_reply(token, topic_id, reply_id)
 
-            # Send PUT request to mark the reply as best
-            response = await client.put(
-                f"http://172.245.56.116:8000/replies/best/{topic_id}/{reply_id}",
-                headers=headers
-            )
+        # Check the status code from the PUT request
+        if response.status_code == 403:
+            return cls._error_response(request, 403)
+
+        if response.status_code != 200:
+            return cls._error_response(request, 500)
 
-            # Check the status code from the PUT request
-            if response.status_code == 403:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
+        cls.invalidate_replies(topic_id)
+        cls.best_reply_cache.invalidate(topic_id)
 
-            if response.status_code != 200:
-                return templates.TemplateResponse("500.html", {"request": request}, status_code=500)
+        if wants_json(request):
+            return JSONResponse({"topic_id": topic_id, "best_reply_id": reply_id})
 
-            # Redirect back to the topic page with anchor to the best reply
-            return RedirectResponse(url=f"/topics/{topic_id}#reply-{reply_id}", status_code=303)
+        # Redirect back to the topic page with anchor to the best reply, which is
+        # pinned to the first page
+        url = await cls._reply_url(token, topic_id, reply_id, page=1)
+        return RedirectResponse(url=url, status_code=303)
 
     @classmethod
-    async def vote_reply(cls, request: Request, reply_id: int, topic_id: int, vote_type: int):
+    def _error_response(cls, request: Request, status_code: int):
+        """
+        Error page for a reply action, or the error as JSON when the request asks for JSON.
+        """
+        if wants_json(request):
+            detail = {403: "Not authorized", 404: "Not found"}.get(status_code, "Internal server error")
+            return JSONResponse({"detail": detail}, status_code=status_code)
+        return templates.TemplateResponse(f"{status_code}.html", {"request": request}, status_code=status_code)
+
+    @classmethod
+    async def vote_reply(cls, request: Request, reply_id: int, topic_id: int, vote_type: int, page: int = None):
         """
         Vote on a reply (like, dislike, or remove vote).
 
@@ -311,9 +519,11 @@ class TopicService:
             reply_id: The ID of the reply to vote on
             topic_id: The ID of the topic the reply belongs to
             vote_type: The type of vote (-1 for dislike, 0 for removing vote, 1 for like)
+            page: The page of the topic the reply is shown on, if known
 
         Returns:
-            RedirectResponse: Redirects back to the topic page
+            RedirectResponse: Redirects back to the topic page, or the user's new vote
+                as JSON when the request asks for JSON
         """
         # Get authentication status
         data = await AuthService.verify_logged_in(request)
@@ -322,24 +532,28 @@ class TopicService:
         token = Cookies.get_access_token_from_cookie(request)
 
         # Send PUT request to vote on the reply
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-
-            # Send PUT request to vote on the reply
-            response = await client.put(
-                f"http://172.245.56.116:8000/replies/vote/{reply_id}",
-                json={"vote_type": vote_type},
-                headers=headers
-            )
-
-            # Check the status code from the PUT request
-            if response.status_code == 403:
-                return templates.TemplateResponse("403.html", {"request": request}, status_code=403)
-
-            if response.status_code != 200:
-                print(response.status_code)
-                print(response.text)
-                return templates.TemplateResponse("500.html", {"request": request}, status_code=500)
-
-            # Redirect back to the topic page with anchor to the voted reply
-            return RedirectResponse(url=f"/topics/{topic_id}#reply-{reply_id}", status_code=303)
+        response = await ApiClient.vote_reply(token, reply_id, vote_type)
+
+        # Check the status code from the PUT request
+        if response.status_code == 403:
+            return cls._error_response(request, 403)
+
+        if response.status_code != 200:
+            print(response.status_code)
+            print(response.text)
+            return cls._error_response(request, 500)
+
+        cls.invalidate_replies(topic_id)
+
+        if wants_json(request):
+            # The score is only known when the backend sends it back; otherwise
+            # the page works it out from the previous vote
+            try:
+                likes = response.json().get("likes")
+            except (ValueError, AttributeError):
+                likes = None
+            return JSONResponse({"reply_id": reply_id, "vote_type": vote_type, "likes": likes})
+
+        # Redirect back to the topic page with anchor to the voted reply
+        url = await cls._reply_url(token, topic_id, reply_id, page=page)
+        return RedirectResponse(url=url, status_code=303)
@@ -2,6 +2,7 @@ import httpx
 from fastapi import Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse
 
+from services.api_client import ApiClient
 from services.auth import AuthService
 from services.cookies import Cookies
 from services.errors import not_authorized, internal_error, not_found
@@ -33,37 +34,32 @@ class UserService:
             raise not_authorized
 
         # Make the API call to get the user profile data
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-            response = await client.get(
-                f"http://172.245.56.116:8000/users/search/{username}",
-                headers=headers
-            )
+        response = await ApiClient.search_user(token, username)
 
-            if response.status_code == 404:
-                raise not_found
+        if response.status_code == 404:
+            raise not_found
 
-            if response.status_code != 200:
-                raise not_authorized
+        if response.status_code != 200:
+            raise not_authorized
 
-            profile_data = response.json()
+        profile_data = response.json()
 
-            # Prepare the data for the template
-            template_data = user_data
-            template_data = template_data | {
-                "request": request,
-                "title": f"Profile - {username}",
-                "profile": profile_data,
-                "is_authenticated": True,
-                "admin": user_data.get("admin", False)
-            }
+        # Prepare the data for the template
+        template_data = user_data
+        template_data = template_data | {
+            "request": request,
+            "title": f"Profile - {username}",
+            "profile": profile_data,
+            "is_authenticated": True,
+            "admin": user_data.get("admin", False)
+        }
 
-            # Render the profile template
-            return templates.TemplateResponse(
-                "profile.html",
-                template_data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        # Render the profile template
+        return templates.TemplateResponse(
+            "profile.html",
+            template_data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def get_user_by_id(cls, request: Request, user_id: int):
@@ -91,42 +87,36 @@ class UserService:
             return RedirectResponse(url="/user/me", status_code=303)
 
         # Make the API call to get the user profile data
-        async with httpx.AsyncClient() as client:
-            headers = {"Cache-Control": "no-cache", "Authorization": token}
-
-            # Add token to the request if available
-            api_url = f"http://172.245.56.116:8000/users/{user_id}"
+        response = await ApiClient.get_user(token, user_id)
 
-            response = await client.get(api_url, headers=headers)
+        if response.status_code == 404:
+            raise not_found
 
-            if response.status_code == 404:
-                raise not_found
-
-            if response.status_code != 200:
-                raise not_authorized
+        if response.status_code != 200:
+            raise not_authorized
 
-            profile_data = response.json()
+        profile_data = response.json()
 
-            # Check if this is the user's own profile
-            is_own_profile = user_data.get("is_authenticated") and "id" in user_data and user_data.get("id") == profile_data.get("id")
+        # Check if this is the user's own profile
+        is_own_profile = user_data.get("is_authenticated") and "id" in user_data and user_data.get("id") == profile_data.get("id")
 
-            # Prepare the data for the template
-            template_data = user_data
-            template_data = template_data | {
-                "request": request,
-                "title": f"User Profile - {profile_data.get('username', 'Unknown')}",
-                "profile": profile_data,
-                "is_authenticated": user_data.get("is_authenticated", False),
-                "admin": user_data.get("admin", False),
-                "is_own_profile": is_own_profile
-            }
+        # Prepare the data for the template
+        template_data = user_data
+        template_data = template_data | {
+            "request": request,
+            "title": f"User Profile - {profile_data.get('username', 'Unknown')}",
+            "profile": profile_data,
+            "is_authenticated": user_data.get("is_authenticated", False),
+            "admin": user_data.get("admin", False),
+            "is_own_profile": is_own_profile
+        }
 
-            # Render the user profile template
-            return templates.TemplateResponse(
-                "user_profile.html",
-                template_data,
-                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-            )
+        # Render the user profile template
+        return templates.TemplateResponse(
+            "user_profile.html",
+            template_data,
+            headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+        )
 
     @classmethod
     async def get_avatar_change_page(cls, request: Request):
@@ -200,56 +190,54 @@ class UserService:
             )
 
         # Make the API call to update the avatar
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.put(
-                    f"http://172.245.56.116:8000/users/avatar/?link={avatar_link}",
-                    headers={"Cache-Control": "no-cache", "Authorization": token}
-                )
-
-                # Prepare the template data based on the response
-                template_data = user_data | {
-                    "request": request,
-                    "title": "Change Avatar",
-                    "is_authenticated": True,
-                    "admin": user_data.get("admin", False)
-                }
-
-                if response.status_code == 200:
-                    template_data["message"] = "Avatar updated successfully!"
-                    template_data["success"] = True
-                else:
-                    # Try to get error message from response
-                    try:
-                        error_data = response.json()
-                        error_message = error_data.get("message", error_data.get("detail", f"Error updating avatar: {response.status_code}"))
-                    except:
-                        error_message = f"Error updating avatar: {response.status_code}"
-
-                    template_data["message"] = error_message
-                    template_data["success"] = False
-
-                # Render the avatar change template with success/error message
-                return templates.TemplateResponse(
-                    "profile_avatar.html",
-                    template_data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
-
-            except httpx.RequestError as e:
-                # Handle connection errors
-                template_data = await AuthService.get_user_data_from_cookie(request) | {
-                    "request": request,
-                    "title": "Change Avatar",
-                    "is_authenticated": True,
-                    "admin": user_data.get("admin", False),
-                    "message": f"Error connecting to API: {str(e)}",
-                    "success": False
-                }
-
-                # Render the avatar change template with error message
-                return templates.TemplateResponse(
-                    "profile_avatar.html",
-                    template_data,
-                    headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
-                )
+        try:
+            response = await ApiClient.update_avatar(token, avatar_link)
+
+            # Prepare the template data based on the response
+            template_data = user_data | {
+                "request": request,
+                "title": "Change Avatar",
+                "is_authenticated": True,
+                "admin": user_data.get("admin", False)
+            }
+
+            if response.status_code == 200:
+                # The cached profile still holds the old avatar
+                AuthService.invalidate_user_cache(token)
+                template_data["message"] = "Avatar updated successfully!"
+                template_data["success"] = True
+            else:
+                # Try to get error message from response
+                try:
+                    error_data = response.json()
+                    error_message = error_data.get("message", error_data.get("detail", f"Error updating avatar: {response.status_code}"))
+                except:
+                    error_message = f"Error updating avatar: {response.status_code}"
+
+                template_data["message"] = error_message
+                template_data["success"] = False
+
+            # Render the avatar change template with success/error message
+            return templates.TemplateResponse(
+                "profile_avatar.html",
+                template_data,
+                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+            )
+
+        except httpx.RequestError as e:
+            # Handle connection errors
+            template_data = await AuthService.get_user_data_from_cookie(request) | {
+                "request": request,
+                "title": "Change Avatar",
+                "is_authenticated": True,
+                "admin": user_data.get("admin", False),
+                "message": f"Error connecting to API: {str(e)}",
+                "success": False
+            }
+
+            # Render the avatar change template with error message
+            return templates.TemplateResponse(
+                "profile_avatar.html",
+                template_data,
+                headers={"Cache-Control": "no-cache, no-store, must-revalidate"}
+            )
@@ -0,0 +1,80 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const path = window.location.pathname;
+    const navLinks = document.querySelectorAll('.navbar-nav .nav-link');
+
+    navLinks.forEach(link => {
+        const href = link.getAttribute('href');
+        // Exact match for "/" (Home), otherwise check for path starting with href
+        if (href === '/' && path === '/' || href !== '/' && path.startsWith(href)) {
+            link.classList.add('active');
+        }
+    });
+
+    const navbar = document.querySelector('.navbar-custom');
+    window.addEventListener('scroll', function() {
+        if (window.scrollY > 50) {
+            navbar.classList.add('scrolled');
+        } else {
+            navbar.classList.remove('scrolled');
+        }
+    });
+
+    // Theme toggle functionality
+    const themeToggle = document.getElementById('theme-toggle');
+    const darkIcon = document.querySelector('.theme-icon-dark');
+    const lightIcon = document.querySelector('.theme-icon-light');
+
+    // Function to set theme
+    function setTheme(isDark) {
+        if (isDark) {
+            document.body.classList.add('dark-theme');
+            document.documentElement.classList.add('dark-theme');
+            darkIcon.classList.add('d-none');
+            lightIcon.classList.remove('d-none');
+        } else {
+            document.body.classList.remove('dark-theme');
+            document.documentElement.classList.remove('dark-theme');
+            lightIcon.classList.add('d-none');
+            darkIcon.classList.remove('d-none');
+        }
+    }
+
+    // Check for saved theme preference or use light theme as default
+    const savedTheme = getCookie('theme');
+    if (savedTheme) {
+        setTheme(savedTheme === 'dark');
+    } else {
+        // Use light theme as default
+        setTheme(false);
+        setCookie('theme', 'light', 365);
+    }
+
+    // Toggle theme on button click
+    themeToggle.addEventListener('click', function() {
+        const isDarkTheme = document.body.classList.contains('dark-theme');
+        setTheme(!isDarkTheme);
+        setCookie('theme', !isDarkTheme ? 'dark' : 'light', 365);
+    });
+
+    // Cookie functions
+    function setCookie(name, value, days) {
+        let expires = '';
+        if (days) {
+            const date = new Date();
+            date.setTime(date.getTime() + (days * 24 * 60 * 60 * 1000));
+            expires = '; expires=' + date.toUTCString();
+        }
+        document.cookie = name + '=' + (value || '') + expires + '; path=/';
+    }
+
+    function getCookie(name) {
+        const nameEQ = name + '=';
+        const ca = document.cookie.split(';');
+        for (let i = 0; i < ca.length; i++) {
+            let c = ca[i];
+            while (c.charAt(0) === ' ') c = c.substring(1, c.length);
+            if (c.indexOf(nameEQ) === 0) return c.substring(nameEQ.length, c.length);
+        }
+        return null;
+    }
+});
@@ -0,0 +1,19 @@
+// Function to get cookie value
+function getCookie(name) {
+    const nameEQ = name + '=';
+    const ca = document.cookie.split(';');
+    for (let i = 0; i < ca.length; i++) {
+        let c = ca[i];
+        while (c.charAt(0) === ' ') c = c.substring(1, c.length);
+        if (c.indexOf(nameEQ) === 0) return c.substring(nameEQ.length, c.length);
+    }
+    return null;
+}
+
+// Apply theme immediately to prevent flash
+const savedTheme = getCookie('theme');
+if (savedTheme === 'dark') {
+    document.documentElement.classList.add('dark-theme');
+    document.body ? document.body.classList.add('dark-theme') : 
+        document.addEventListener('DOMContentLoaded', () => document.body.classList.add('dark-theme'));
+}